@@ -1,9 +1,11 @@
 import streamlit as st
 import firebase_admin
-from firebase_admin import credentials, firestore, auth, storage
+from firebase_admin import credentials, firestore, auth
 from datetime import datetime
-from PIL import Image
-import uuid, io
+import uuid, os
+import profiler
+from image_upload import get_uploader
+from fs_posts import load_timeline_pages, load_comments, toggle_like, liked_posts, add_comment, create_post
 
 # ======================
 # Firebase Init
@@ -14,15 +16,20 @@ if not firebase_admin._apps:
         "storageBucket": "<YOUR_PROJECT_ID>.appspot.com"
     })
 
-db = firestore.client()
-bucket = storage.bucket()
+with profiler.start("2app.py") as prof:
+    db = profiler.wrap_firestore(firestore.client())
+    # AOUSE_LOCAL_BUCKET=<폴더> 면 Cloud Storage 대신 로컬 폴더에 저장 (테스트용)
+    bucket_name = None  # 기본 버킷 (storageBucket)
+    if os.environ.get("AOUSE_LOCAL_BUCKET"):
+        bucket_name = "local:" + os.environ["AOUSE_LOCAL_BUCKET"]
+    uploader = get_uploader(bucket_name)
 
-# ======================
-# Page / Dark UI
-# ======================
-st.set_page_config(page_title="AOUSE", layout="centered")
+    # ======================
+    # Page / Dark UI
+    # ======================
+    st.set_page_config(page_title="AOUSE", layout="centered")
 
-st.markdown("""
+    st.markdown("""
 <style>
 html, body { background:#0f0f0f; color:white; }
 .block-container { max-width:420px; padding:1.2rem; }
@@ -34,196 +41,182 @@ hr { border:0; border-top:1px solid #222; }
 </style>
 """, unsafe_allow_html=True)
 
-# ======================
-# Session
-# ======================
-if "uid" not in st.session_state:
-    st.session_state.uid = None
-if "profile" not in st.session_state:
-    st.session_state.profile = None
-
-# ======================
-# Badge auto update
-# ======================
-def update_badge(uid):
-    posts = list(db.collection("posts").where("user_id","==",uid).stream())
-    c = len(posts)
-
-    badge = "FRIEND"
-    if c >= 5: badge = "ACTIVE"
-    if c >= 15: badge = "CREATOR"
-    if c >= 30: badge = "ICON"
-
-    db.collection("users").document(uid).update({"badge": badge})
-    st.session_state.profile["badge"] = badge
-
-# ======================
-# Login
-# ======================
-def login():
-    st.title("AOUSE")
-    st.caption("private space for friends")
-    if st.button("enter"):
-        user = auth.create_user(uid=str(uuid.uuid4()))
-        st.session_state.uid = user.uid
-        st.experimental_rerun()
+    # ======================
+    # Session
+    # ======================
+    if "uid" not in st.session_state:
+        st.session_state.uid = None
+    if "profile" not in st.session_state:
+        st.session_state.profile = None
+    if "timeline_pages" not in st.session_state:
+        st.session_state.timeline_pages = 1
+    if "open_comments" not in st.session_state:
+        st.session_state.open_comments = set()
+
+    # ======================
+    # Login
+    # ======================
+    def login():
+        st.title("AOUSE")
+        st.caption("private space for friends")
+        if st.button("enter"):
+            user = auth.create_user(uid=str(uuid.uuid4()))
+            st.session_state.uid = user.uid
+            st.rerun()
+
+    # ======================
+    # Profile setup / edit
+    # ======================
+    def profile_setup(edit=False):
+        st.subheader("Edit profile" if edit else "Set up profile")
+
+        nickname = st.text_input(
+            "Nickname",
+            value=st.session_state.profile["nickname"] if edit else ""
+        )
+        image = st.file_uploader("Profile image", type=["png","jpg"])
 
-# ======================
-# Profile setup / edit
-# ======================
-def profile_setup(edit=False):
-    st.subheader("Edit profile" if edit else "Set up profile")
-
-    nickname = st.text_input(
-        "Nickname",
-        value=st.session_state.profile["nickname"] if edit else ""
-    )
-    image = st.file_uploader("Profile image", type=["png","jpg"])
-
-    if st.button("Save"):
-        img_url = st.session_state.profile["profile_image"] if edit else None
-
-        if image:
-            img = Image.open(image)
-            buf = io.BytesIO()
-            img.save(buf, format="PNG")
-            blob = bucket.blob(f"profile/{st.session_state.uid}.png")
-            blob.upload_from_string(buf.getvalue(), content_type="image/png")
-            blob.make_public()
-            img_url = blob.public_url
-
-        profile = {
-            "nickname": nickname,
-            "profile_image": img_url,
-            "badge": st.session_state.profile["badge"] if edit else "FRIEND"
-        }
-
-        db.collection("users").document(st.session_state.uid).set(profile)
-        st.session_state.profile = profile
-        st.experimental_rerun()
+        if st.button("Save"):
+            img_url = st.session_state.profile["profile_image"] if edit else None
+            upload = None
 
-# ======================
-# Timeline
-# ======================
-def timeline():
-    st.markdown(
-        f"**{st.session_state.profile['nickname']}** "
-        f"<span class='small'>🏷 {st.session_state.profile['badge']}</span>",
-        unsafe_allow_html=True
-    )
-
-    if st.button("Edit profile"):
-        profile_setup(edit=True)
-        st.stop()
-
-    st.divider()
-
-    # New post
-    with st.form("post"):
-        text = st.text_area("Write something")
-        image = st.file_uploader("Image", type=["png","jpg"])
-        send = st.form_submit_button("Post")
-
-        if send:
-            img_url = None
             if image:
-                img = Image.open(image)
-                buf = io.BytesIO()
-                img.save(buf, format="PNG")
-                blob = bucket.blob(f"posts/{uuid.uuid4()}.png")
-                blob.upload_from_string(buf.getvalue(), content_type="image/png")
-                blob.make_public()
-                img_url = blob.public_url
-
-            db.collection("posts").add({
-                "user_id": st.session_state.uid,
-                "nickname": st.session_state.profile["nickname"],
-                "badge": st.session_state.profile["badge"],
-                "text": text,
-                "image": img_url,
-                "time": datetime.now(),
-                "likes": [],
-                "comments": []
-            })
-
-            update_badge(st.session_state.uid)
-            st.experimental_rerun()
-
-    st.divider()
-
-    # Posts
-    posts = db.collection("posts").order_by("time", direction=firestore.Query.DESCENDING).stream()
-
-    for p in posts:
-        d = p.to_dict()
-
+                img_url, upload = uploader.submit(f"profile/{st.session_state.uid}", image)
+
+            profile = {
+                "nickname": nickname,
+                "profile_image": img_url,
+                "badge": st.session_state.profile["badge"] if edit else "FRIEND"
+            }
+
+            # merge: post_count 는 그대로 둔다
+            db.collection("users").document(st.session_state.uid).set(profile, merge=True)
+            if upload:
+                upload.result()
+            st.session_state.profile = {**(st.session_state.profile or {}), **profile}
+            st.rerun()
+
+    # ======================
+    # Timeline
+    # ======================
+    def timeline():
         st.markdown(
-            f"**{d['nickname']}** <span class='small'>🏷 {d['badge']}</span>",
+            f"**{st.session_state.profile['nickname']}** "
+            f"<span class='small'>🏷 {st.session_state.profile['badge']}</span>",
             unsafe_allow_html=True
         )
-        if d["text"]:
-            st.write(d["text"])
-        if d["image"]:
-            st.image(d["image"], use_column_width=True)
-
-        # Like
-        likes = d["likes"]
-        if st.button(f"❤️ {len(likes)}", key=p.id):
-            if st.session_state.uid in likes:
-                likes.remove(st.session_state.uid)
-            else:
-                likes.append(st.session_state.uid)
-            db.collection("posts").document(p.id).update({"likes": likes})
-            st.experimental_rerun()
-
-        # Comments + replies
-        for c in d["comments"]:
-            st.markdown(f"**{c['nickname']}** {c['text']}")
-
-            for r in c["replies"]:
-                st.markdown(
-                    f"<div class='reply'>↳ {r['nickname']} {r['text']}</div>",
-                    unsafe_allow_html=True
-                )
-
-            reply = st.text_input("reply", key=f"r_{p.id}_{c['id']}")
-            if st.button("↳", key=f"rb_{p.id}_{c['id']}"):
-                c["replies"].append({
+
+        if st.button("Edit profile"):
+            profile_setup(edit=True)
+            st.stop()
+
+        st.divider()
+
+        # New post
+        with st.form("post"):
+            text = st.text_area("Write something")
+            image = st.file_uploader("Image", type=["png","jpg"])
+            send = st.form_submit_button("Post")
+
+            if send:
+                img_url, upload = None, None
+                if image:
+                    # 업로드는 백그라운드, URL 은 바로 나온다
+                    img_url, upload = uploader.submit(f"posts/{uuid.uuid4()}", image)
+
+                # 글 추가 + post_count / 뱃지 갱신 (한 트랜잭션)
+                count, badge = create_post(db, st.session_state.uid, {
+                    "user_id": st.session_state.uid,
                     "nickname": st.session_state.profile["nickname"],
-                    "text": reply
+                    "badge": st.session_state.profile["badge"],
+                    "text": text,
+                    "image": img_url,
+                    "time": datetime.now(),
+                    "like_count": 0,
+                    "comment_count": 0
                 })
-                db.collection("posts").document(p.id).update({"comments": d["comments"]})
-                st.experimental_rerun()
-
-        # New comment
-        comment = st.text_input("comment", key=f"c_{p.id}")
-        if st.button("send", key=f"s_{p.id}"):
-            d["comments"].append({
-                "id": str(uuid.uuid4()),
-                "nickname": st.session_state.profile["nickname"],
-                "text": comment,
-                "replies": []
-            })
-            db.collection("posts").document(p.id).update({"comments": d["comments"]})
-            st.experimental_rerun()
+                if upload:
+                    upload.result()  # 다시 그리기 전에 이미지가 올라가 있게
+                st.session_state.profile["post_count"] = count
+                st.session_state.profile["badge"] = badge
+                st.rerun()
 
         st.divider()
 
-# ======================
-# Run
-# ======================
-if st.session_state.uid is None:
-    login()
-else:
-    if st.session_state.profile is None:
-        doc = db.collection("users").document(st.session_state.uid).get()
-        if doc.exists:
-            st.session_state.profile = doc.to_dict()
-            timeline()
-        else:
-            profile_setup()
+        # Posts (페이지 단위, 목록은 개수만)
+        with prof.section("timeline load"):
+            docs, more = load_timeline_pages(db, st.session_state.timeline_pages)
+            liked = liked_posts(db, [p.id for p in docs], st.session_state.uid)
+
+        for p in docs:
+            d = p.to_dict()
+
+            st.markdown(
+                f"**{d['nickname']}** <span class='small'>🏷 {d['badge']}</span>",
+                unsafe_allow_html=True
+            )
+            if d["text"]:
+                st.write(d["text"])
+            if d["image"]:
+                st.image(d["image"], use_column_width=True)
+
+            # Like
+            heart = "❤️" if p.id in liked else "🤍"
+            if st.button(f"{heart} {d.get('like_count', 0)}", key=p.id):
+                toggle_like(db, p.id, st.session_state.uid)
+                st.rerun()
+
+            # Comments + replies (펼쳤을 때만 읽음)
+            opened = p.id in st.session_state.open_comments
+            if st.button(f"💬 {d.get('comment_count', 0)}", key=f"oc_{p.id}"):
+                st.session_state.open_comments ^= {p.id}
+                st.rerun()
+
+            if opened:
+                comments = load_comments(db, p.id)
+                for c in comments:
+                    st.markdown(f"**{c['nickname']}** {c['text']}")
+
+                    for r in c["replies"]:
+                        st.markdown(
+                            f"<div class='reply'>↳ {r['nickname']} {r['text']}</div>",
+                            unsafe_allow_html=True
+                        )
+
+                    reply = st.text_input("reply", key=f"r_{p.id}_{c['id']}")
+                    if st.button("↳", key=f"rb_{p.id}_{c['id']}"):
+                        add_comment(db, p.id, st.session_state.profile["nickname"], reply, parent=c["id"])
+                        st.rerun()
+
+                # New comment
+                comment = st.text_input("comment", key=f"c_{p.id}")
+                if st.button("send", key=f"s_{p.id}"):
+                    add_comment(db, p.id, st.session_state.profile["nickname"], comment)
+                    st.rerun()
+
+            st.divider()
+
+        if more is not None and st.button("more"):
+            st.session_state.timeline_pages += 1
+            st.rerun()
+
+    # ======================
+    # Run
+    # ======================
+    if st.session_state.uid is None:
+        login()
     else:
-        timeline()
-
-
+        if st.session_state.profile is None:
+            doc = db.collection("users").document(st.session_state.uid).get()
+            if doc.exists:
+                st.session_state.profile = doc.to_dict()
+                timeline()
+            else:
+                profile_setup()
+        else:
+            timeline()
 
+# ======================
+# Debug (AOUSE_DEBUG=1 일 때만)
+# ======================
+profiler.debug_panel(prof, os.environ.get("AOUSE_DEBUG") == "1")
@@ -1,25 +1,35 @@
 import streamlit as st
-import sqlite3
+from db import get_db
+from cache import get_cache
 from datetime import datetime
 import os
-from uuid import uuid4
+from thumbs import get_thumbnailer
+from qna import load_threads_pages
+from uploadgc import get_gc
+from blobstore import get_uploads, UploadTooLarge
+from search import fts_migration, words_migration, search_box
+import profiler
 
 st.set_page_config(page_title="Privcht", layout="centered")
+with profiler.start("Privcht") as prof:
 
-# ================== FILE DIR ==================
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # ================== FILE DIR ==================
+    UPLOAD_DIR = "uploads"
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    thumbs = get_thumbnailer(UPLOAD_DIR)
+    gc = get_gc(UPLOAD_DIR, [
+        ("privcht.db", "SELECT image FROM messages UNION SELECT profile FROM admins"),
+    ])
+    uploads = get_uploads(UPLOAD_DIR)
 
-def save_file(file):
-    ext = file.name.split(".")[-1]
-    fname = f"{uuid4()}.{ext}"
-    path = os.path.join(UPLOAD_DIR, fname)
-    with open(path, "wb") as f:
-        f.write(file.getbuffer())
-    return path
+    def save_file(file):
+        # 내용 해시로 저장 (같은 파일은 한 번만), 크기 제한 넘으면 UploadTooLarge
+        path = uploads.save(file)
+        thumbs.schedule(path)
+        return path
 
-# ================== STYLE ==================
-st.markdown("""
+    # ================== STYLE ==================
+    st.markdown("""
 <style>
 body { background:#f7f7f7; }
 
@@ -68,108 +78,165 @@ body { background:#f7f7f7; }
 </style>
 """, unsafe_allow_html=True)
 
-# ================== DB ==================
-conn = sqlite3.connect("privcht.db", check_same_thread=False)
-c = conn.cursor()
+    # ================== DB ==================
+    db = get_db("privcht.db")
+    conn = db.reader()
+    cache = get_cache("privcht.db")
 
-c.execute("""CREATE TABLE IF NOT EXISTS admins (
+    MIGRATIONS = [
+        # 1: 초기 스키마
+        """
+CREATE TABLE IF NOT EXISTS admins (
     id TEXT PRIMARY KEY,
     pw TEXT,
     name TEXT,
     profile TEXT
-)""")
+);
 
-c.execute("""CREATE TABLE IF NOT EXISTS messages (
+CREATE TABLE IF NOT EXISTS messages (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     content TEXT,
     image TEXT,
     time TEXT
-)""")
+);
 
-c.execute("""CREATE TABLE IF NOT EXISTS replies (
+CREATE TABLE IF NOT EXISTS replies (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     message_id INTEGER,
     admin_id TEXT,
     content TEXT,
     time TEXT
-)""")
-
-conn.commit()
-
-# ================== SESSION ==================
-if "admin" not in st.session_state:
-    st.session_state.admin = None
-
-# ================== HEADER ==================
-st.markdown("<h2 style='text-align:center'>💬 Privcht</h2>", unsafe_allow_html=True)
-
-# ================== SIDEBAR ==================
-if st.session_state.admin:
-    with st.sidebar:
-        st.markdown(f"### 🎤 {st.session_state.admin[2]}")
-        if st.button("Logout"):
-            st.session_state.admin = None
-            st.rerun()
-else:
-    with st.expander("🔐 Admin Login"):
-        aid = st.text_input("ID")
-        apw = st.text_input("PW", type="password")
-
-        if st.button("Login"):
-            admin = c.execute(
-                "SELECT * FROM admins WHERE id=? AND pw=?",
-                (aid, apw)
-            ).fetchone()
-            if admin:
-                st.session_state.admin = admin
+);
+""",
+        # 2: 질문별 답변 조회용
+        """
+CREATE INDEX IF NOT EXISTS idx_replies_message ON replies(message_id, id);
+""",
+        # 3: 답변 수 (미답변 필터용) + 미답변만 담는 부분 인덱스
+        """
+ALTER TABLE messages ADD COLUMN reply_count INTEGER NOT NULL DEFAULT 0;
+UPDATE messages SET reply_count = (SELECT COUNT(*) FROM replies WHERE message_id = messages.id);
+CREATE INDEX IF NOT EXISTS idx_messages_unanswered ON messages(id) WHERE reply_count = 0;
+""",
+        # 4: replies.message_id -> messages FK (ON DELETE CASCADE), 테이블 재생성
+        """
+DELETE FROM replies WHERE message_id NOT IN (SELECT id FROM messages);
+CREATE TABLE replies_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id INTEGER NOT NULL REFERENCES messages(id) ON DELETE CASCADE,
+    admin_id TEXT,
+    content TEXT,
+    time TEXT
+);
+INSERT INTO replies_new SELECT * FROM replies;
+DROP TABLE replies;
+ALTER TABLE replies_new RENAME TO replies;
+CREATE INDEX idx_replies_message ON replies(message_id, id);
+""",
+        # 5: 전문 검색 (FTS5 trigram)
+        fts_migration("messages", ["content"]),
+        # 6: 짧은(2글자) 검색어용 어절 접두 검색
+        words_migration("messages", ["content"]),
+    ]
+
+    db.migrate(MIGRATIONS)
+
+    # ================== SESSION ==================
+    if "admin" not in st.session_state:
+        st.session_state.admin = None
+    if "thread_pages" not in st.session_state:
+        st.session_state.thread_pages = {"all": 1, "open": 1}
+
+    # ================== HEADER ==================
+    st.markdown("<h2 style='text-align:center'>💬 Privcht</h2>", unsafe_allow_html=True)
+
+    # ================== SIDEBAR ==================
+    if st.session_state.admin:
+        with st.sidebar:
+            st.markdown(f"### 🎤 {st.session_state.admin[2]}")
+            st.caption(gc.report())
+            if st.button("Logout"):
+                st.session_state.admin = None
                 st.rerun()
-            else:
-                st.error("로그인 실패")
-
-        st.markdown("### ➕ 관리자 생성")
-        nid = st.text_input("New ID")
-        npw = st.text_input("New PW", type="password")
-        name = st.text_input("Artist Name")
-        pfile = st.file_uploader("프로필 사진", type=["png","jpg","jpeg"])
-
-        if st.button("Create Admin"):
-            try:
-                path = save_file(pfile) if pfile else None
-                c.execute(
-                    "INSERT INTO admins VALUES (?,?,?,?)",
-                    (nid, npw, name, path)
-                )
-                conn.commit()
-                st.success("관리자 생성 완료")
-            except:
-                st.error("이미 존재하는 ID")
-
-# ================== CHAT ==================
-msgs = c.execute("SELECT * FROM messages ORDER BY id").fetchall()
-
-for m in msgs:
-    st.markdown(f"""
+    else:
+        with st.expander("🔐 Admin Login"):
+            aid = st.text_input("ID")
+            apw = st.text_input("PW", type="password")
+
+            if st.button("Login"):
+                admin = conn.execute(
+                    "SELECT * FROM admins WHERE id=? AND pw=?",
+                    (aid, apw)
+                ).fetchone()
+                if admin:
+                    st.session_state.admin = admin
+                    st.rerun()
+                else:
+                    st.error("로그인 실패")
+
+            st.markdown("### ➕ 관리자 생성")
+            nid = st.text_input("New ID")
+            npw = st.text_input("New PW", type="password")
+            name = st.text_input("Artist Name")
+            pfile = st.file_uploader("프로필 사진", type=["png","jpg","jpeg"])
+
+            if st.button("Create Admin"):
+                path = None
+                try:
+                    path = save_file(pfile) if pfile else None
+                    with db.writer() as w:
+                        w.execute(
+                            "INSERT INTO admins VALUES (?,?,?,?)",
+                            (nid, npw, name, path)
+                        )
+                    cache.invalidate("admins")
+                    st.success("관리자 생성 완료")
+                except UploadTooLarge as e:
+                    st.error(str(e))
+                except:
+                    uploads.release(path)
+                    st.error("이미 존재하는 ID")
+
+    # ================== SEARCH ==================
+    results = search_box(conn, "messages", "search_messages", "🔍 질문 검색")
+    for r in results or []:
+        st.markdown(f"<span class='time'>{r[3]} · 답변 {r[4]}</span><br>{r[-1]}", unsafe_allow_html=True)
+    if results is not None:
+        st.markdown("---")
+
+    # ================== CHAT ==================
+    # 최신 질문 몇 페이지만 (질문 1번 + 답변 1번), 관리자 프로필은 메모리 캐시
+    unanswered = bool(st.session_state.admin) and st.toggle("미답변만 보기")
+    mode = "open" if unanswered else "all"
+
+    msgs, replies_by_msg, more = load_threads_pages(
+        conn, st.session_state.thread_pages[mode], unanswered=unanswered
+    )
+
+    if more is not None and st.button("⬆ 이전 질문 더 보기"):
+        st.session_state.thread_pages[mode] += 1
+        st.rerun()
+
+    admins = cache.get(
+        "admins",
+        lambda: {a[0]: (a[1], a[2]) for a in conn.execute("SELECT id, name, profile FROM admins")}
+    )
+
+    for m in reversed(msgs):
+        st.markdown(f"""
     <div class="bubble-right">
         {m[1].replace("\\n","<br>")}
         <div class="time">{m[3]}</div>
     </div>
     """, unsafe_allow_html=True)
 
-    if m[2]:
-        st.image(m[2], width=220)
-
-    replies = c.execute(
-        "SELECT * FROM replies WHERE message_id=?",
-        (m[0],)
-    ).fetchall()
+        if m[2]:
+            st.image(thumbs.pick(m[2], 220), width=220)
 
-    for r in replies:
-        admin = c.execute(
-            "SELECT name, profile FROM admins WHERE id=?",
-            (r[2],)
-        ).fetchone()
+        for r in replies_by_msg.get(m[0], []):
+            admin = admins.get(r[2], ("?", None))
 
-        st.markdown(f"""
+            st.markdown(f"""
         <div class="bubble-left">
             <div class="admin-row">
                 <img src="{admin[1] if admin[1] else 'https://dummyimage.com/100x100/ddd/000&text=🎤'}" class="admin-img">
@@ -182,40 +249,54 @@ for m in msgs:
         </div>
         """, unsafe_allow_html=True)
 
-    if st.session_state.admin:
-        with st.expander("↩ 답변 / 관리"):
-            reply = st.text_area("답변", key=f"r{m[0]}", height=100)
-            if st.button("Send", key=f"s{m[0]}"):
-                c.execute(
-                    "INSERT INTO replies VALUES (NULL,?,?,?,?)",
-                    (
-                        m[0],
-                        st.session_state.admin[0],
-                        reply,
-                        datetime.now().strftime("%Y-%m-%d %H:%M")
-                    )
-                )
-                conn.commit()
-                st.rerun()
+        if st.session_state.admin:
+            with st.expander("↩ 답변 / 관리"):
+                reply = st.text_area("답변", key=f"r{m[0]}", height=100)
+                if st.button("Send", key=f"s{m[0]}"):
+                    with db.writer() as w:
+                        w.execute(
+                            "INSERT INTO replies VALUES (NULL,?,?,?,?)",
+                            (
+                                m[0],
+                                st.session_state.admin[0],
+                                reply,
+                                datetime.now().strftime("%Y-%m-%d %H:%M")
+                            )
+                        )
+                        w.execute("UPDATE messages SET reply_count = reply_count + 1 WHERE id=?", (m[0],))
+                    st.rerun()
+
+                if st.button("❌ 질문 삭제", key=f"d{m[0]}"):
+                    # 답변은 FK CASCADE 로 같이 지워지고, 이미지는 release 로 참조를 줄여 마지막이면 바로 지움
+                    # (참조 카운트 밖의 예전 업로드만 GC 가 회수)
+                    with db.writer() as w:
+                        w.execute("DELETE FROM messages WHERE id=?", (m[0],))
+                    gc.released(uploads.release(m[2]))
+                    st.rerun()
 
-            if st.button("❌ 질문 삭제", key=f"d{m[0]}"):
-                c.execute("DELETE FROM messages WHERE id=?", (m[0],))
-                c.execute("DELETE FROM replies WHERE message_id=?", (m[0],))
-                conn.commit()
+    # ================== INPUT ==================
+    st.markdown("---")
+    with st.form("send"):
+        msg = st.text_area("질문", height=60)
+        img = st.file_uploader("이미지 업로드 (선택)", type=["png","jpg","jpeg"])
+        if st.form_submit_button("Send"):
+            if msg.strip():
+                try:
+                    img_path = save_file(img) if img else None
+                except UploadTooLarge as e:
+                    st.error(str(e))
+                    st.stop()
+                try:
+                    with db.writer() as w:
+                        w.execute(
+                            "INSERT INTO messages (content, image, time) VALUES (?,?,?)",
+                            (msg, img_path,
+                             datetime.now().strftime("%Y-%m-%d %H:%M"))
+                        )
+                except:
+                    uploads.release(img_path)  # 올려 둔 참조 카운트를 되돌림
+                    raise
                 st.rerun()
 
-# ================== INPUT ==================
-st.markdown("---")
-with st.form("send"):
-    msg = st.text_area("질문", height=60)
-    img = st.file_uploader("이미지 업로드 (선택)", type=["png","jpg","jpeg"])
-    if st.form_submit_button("Send"):
-        if msg.strip():
-            img_path = save_file(img) if img else None
-            c.execute(
-                "INSERT INTO messages VALUES (NULL,?,?,?)",
-                (msg, img_path,
-                 datetime.now().strftime("%Y-%m-%d %H:%M"))
-            )
-            conn.commit()
-            st.rerun()
+# ================== DEBUG ==================
+profiler.debug_panel(prof, st.session_state.admin is not None)
@@ -1,134 +1,137 @@
 import streamlit as st
-import json, os, uuid
+import os, uuid
 from PIL import Image
+from db import get_db
+from thumbs import get_thumbnailer
+from local_posts import SCHEMA, LIKE_COUNT, import_json, load_posts_pages, add_post, toggle_like, add_comment, add_reply
+import profiler
 
 # ======================
 # 기본 세팅
 # ======================
 st.set_page_config(page_title="AOUSE", layout="centered")
+with profiler.start("4app.py") as prof:
+
+    DATA_FILE = "data.json"   # 예전 저장 파일 (처음 실행 때 DB 로 가져옴)
+    IMAGE_DIR = "images"
+
+    ADMIN_NAME = "ARTIST"   # 관리자 이름
+
+    if not os.path.exists(IMAGE_DIR):
+        os.mkdir(IMAGE_DIR)
+    thumbs = get_thumbnailer(IMAGE_DIR)
+
+    # ======================
+    # DB
+    # ======================
+    db = get_db("aouse.db")
+    conn = db.reader()
+
+    MIGRATIONS = [
+        # 1: 초기 스키마
+        SCHEMA,
+        # 2: data.json 가져오기
+        lambda c: import_json(c, DATA_FILE),
+        # 3: 좋아요 수 컬럼
+        LIKE_COUNT,
+    ]
+
+    db.migrate(MIGRATIONS)
+
+    # ======================
+    # 세션 (로그인 대체)
+    # ======================
+    if "name" not in st.session_state:
+        st.session_state.name = ""
+    if "post_pages" not in st.session_state:
+        st.session_state.post_pages = 1
+
+    # ======================
+    # 프로필 설정
+    # ======================
+    st.title("AOUSE")
+
+    if st.session_state.name == "":
+        name = st.text_input("닉네임")
+        if st.button("입장"):
+            st.session_state.name = name
+            st.rerun()
+        st.stop()
+
+    is_admin = st.session_state.name == ADMIN_NAME
+
+    st.caption(
+        "⭐ ARTIST" if is_admin else "FRIEND"
+    )
 
-DATA_FILE = "data.json"
-IMAGE_DIR = "images"
-
-ADMIN_NAME = "ARTIST"   # 관리자 이름
-
-if not os.path.exists(IMAGE_DIR):
-    os.mkdir(IMAGE_DIR)
-
-# ======================
-# 데이터 로드 / 저장
-# ======================
-def load_data():
-    if not os.path.exists(DATA_FILE):
-        return []
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-posts = load_data()
-
-# ======================
-# 세션 (로그인 대체)
-# ======================
-if "name" not in st.session_state:
-    st.session_state.name = ""
-
-# ======================
-# 프로필 설정
-# ======================
-st.title("AOUSE")
-
-if st.session_state.name == "":
-    name = st.text_input("닉네임")
-    if st.button("입장"):
-        st.session_state.name = name
-        st.experimental_rerun()
-    st.stop()
-
-is_admin = st.session_state.name == ADMIN_NAME
-
-st.caption(
-    "⭐ ARTIST" if is_admin else "FRIEND"
-)
-
-st.divider()
+    st.divider()
 
-# ======================
-# 글 작성
-# ======================
-with st.form("post_form"):
-    content = st.text_area("게시글")
-    img = st.file_uploader("사진", ["png","jpg"])
-    ok = st.form_submit_button("업로드")
-
-    if ok:
-        img_path = None
-        if img:
-            image = Image.open(img)
-            path = f"{IMAGE_DIR}/{uuid.uuid4()}.png"
-            image.save(path)
-            img_path = path
-
-        posts.insert(0, {
-            "id": str(uuid.uuid4()),
-            "author": st.session_state.name,
-            "text": content,
-            "image": img_path,
-            "likes": [],
-            "comments": []
-        })
-        save_data(posts)
-        st.experimental_rerun()
+    # ======================
+    # 글 작성
+    # ======================
+    with st.form("post_form"):
+        content = st.text_area("게시글")
+        img = st.file_uploader("사진", ["png","jpg"])
+        ok = st.form_submit_button("업로드")
+
+        if ok:
+            img_path = None
+            if img:
+                image = Image.open(img)
+                path = f"{IMAGE_DIR}/{uuid.uuid4()}.png"
+                image.save(path)
+                thumbs.schedule(path)
+                img_path = path
+
+            add_post(db, str(uuid.uuid4()), st.session_state.name, content, img_path)
+            st.rerun()
+
+    # ======================
+    # 타임라인
+    # ======================
+    posts, more = load_posts_pages(conn, st.session_state.name, st.session_state.post_pages)
+
+    for post in posts:
+        st.subheader(
+            f"{post['author']} {'⭐ ARTIST' if post['author']==ADMIN_NAME else ''}"
+        )
+
+        if post["text"]:
+            st.write(post["text"])
+        if post["image"]:
+            st.image(thumbs.pick(post["image"], 720), use_column_width=True)
+
+        # 좋아요
+        if st.button(f"{'❤️' if post['liked'] else '🤍'} {post['like_count']}", key=post["id"]):
+            toggle_like(db, post["id"], st.session_state.name)
+            st.rerun()
+
+        # 댓글
+        for c in post["comments"]:
+            st.markdown(f"**{c['author']}** {c['text']}")
+            for r in c["replies"]:
+                st.markdown(f"> ⭐ ARTIST {r}")
+
+        # 댓글 입력
+        comment = st.text_input("댓글", key=post["id"]+"_c")
+        if st.button("전송", key=post["id"]+"_s"):
+            add_comment(db, post["id"], st.session_state.name, comment)
+            st.rerun()
+
+        # 관리자 대댓글
+        if is_admin and post["comments"]:
+            reply = st.text_input("관리자 대댓글", key=post["id"]+"_r")
+            if st.button("답글", key=post["id"]+"_rb"):
+                add_reply(db, post["comments"][-1]["id"], reply)
+                st.rerun()
+
+        st.divider()
+
+    if more is not None and st.button("더 보기", key="more_posts"):
+        st.session_state.post_pages += 1
+        st.rerun()
 
 # ======================
-# 타임라인
+# Debug
 # ======================
-for post in posts:
-    st.subheader(
-        f"{post['author']} {'⭐ ARTIST' if post['author']==ADMIN_NAME else ''}"
-    )
-
-    if post["text"]:
-        st.write(post["text"])
-    if post["image"]:
-        st.image(post["image"], use_column_width=True)
-
-    # 좋아요
-    like_count = len(post["likes"])
-    if st.button(f"❤️ {like_count}", key=post["id"]):
-        if st.session_state.name in post["likes"]:
-            post["likes"].remove(st.session_state.name)
-        else:
-            post["likes"].append(st.session_state.name)
-        save_data(posts)
-        st.experimental_rerun()
-
-    # 댓글
-    for c in post["comments"]:
-        st.markdown(f"**{c['author']}** {c['text']}")
-        for r in c["replies"]:
-            st.markdown(f"> ⭐ ARTIST {r}")
-
-    # 댓글 입력
-    comment = st.text_input("댓글", key=post["id"]+"_c")
-    if st.button("전송", key=post["id"]+"_s"):
-        post["comments"].append({
-            "author": st.session_state.name,
-            "text": comment,
-            "replies": []
-        })
-        save_data(posts)
-        st.experimental_rerun()
-
-    # 관리자 대댓글
-    if is_admin and post["comments"]:
-        reply = st.text_input("관리자 대댓글", key=post["id"]+"_r")
-        if st.button("답글", key=post["id"]+"_rb"):
-            post["comments"][-1]["replies"].append(reply)
-            save_data(posts)
-            st.experimental_rerun()
-
-    st.divider()
+profiler.debug_panel(prof, is_admin)
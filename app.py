@@ -1,24 +1,34 @@
 import streamlit as st
+import html
 from datetime import datetime
-import sqlite3
+from db import get_db
+from cache import get_cache
+from feed import load_feed_pages
+from chat import REFRESH, chat_window
+from chatbus import get_bus
+from search import fts_migration, words_migration, search_box
+import profiler
 
 st.set_page_config(page_title="My Channel", layout="wide")
-
-# ================= DB =================
-conn = sqlite3.connect("channel.db", check_same_thread=False)
-c = conn.cursor()
-
-# ---------- tables ----------
-c.execute("""
+with profiler.start("app.py") as prof:
+
+    # ================= DB =================
+    db = get_db("channel.db")
+    conn = db.reader()
+    cache = get_cache("channel.db")
+    bus = get_bus("channel.db")
+
+    # ---------- migrations ----------
+    MIGRATIONS = [
+        # 1: 초기 스키마
+        """
 CREATE TABLE IF NOT EXISTS profile (
     username TEXT PRIMARY KEY,
     bio TEXT,
     profile_url TEXT,
     password TEXT
-)
-""")
+);
 
-c.execute("""
 CREATE TABLE IF NOT EXISTS feed_admin (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     content TEXT,
@@ -26,10 +36,8 @@ CREATE TABLE IF NOT EXISTS feed_admin (
     likes INTEGER DEFAULT 0,
     writer TEXT,
     time TEXT
-)
-""")
+);
 
-c.execute("""
 CREATE TABLE IF NOT EXISTS feed_fan (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     content TEXT,
@@ -37,10 +45,8 @@ CREATE TABLE IF NOT EXISTS feed_fan (
     likes INTEGER DEFAULT 0,
     writer TEXT,
     time TEXT
-)
-""")
+);
 
-c.execute("""
 CREATE TABLE IF NOT EXISTS comments (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     feed_type TEXT,
@@ -48,232 +54,280 @@ CREATE TABLE IF NOT EXISTS comments (
     nickname TEXT,
     comment TEXT,
     time TEXT
-)
-""")
+);
 
-c.execute("""
 CREATE TABLE IF NOT EXISTS chat (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     nickname TEXT,
     message TEXT,
     time TEXT
-)
-""")
+);
 
-c.execute("""
 CREATE TABLE IF NOT EXISTS chat_theme (
     id INTEGER PRIMARY KEY,
     bg_color TEXT,
     text_color TEXT
-)
-""")
-conn.commit()
-
-# ---------- default admin ----------
-c.execute("SELECT * FROM profile WHERE username='admin'")
-if not c.fetchone():
-    c.execute(
-        "INSERT INTO profile VALUES (?,?,?,?)",
-        ("admin", "안녕하세요! 관리자입니다.", "https://via.placeholder.com/150", "1234")
+);
+
+-- ---------- default admin / theme ----------
+INSERT OR IGNORE INTO profile VALUES ('admin', '안녕하세요! 관리자입니다.', 'https://via.placeholder.com/150', '1234');
+INSERT OR IGNORE INTO chat_theme VALUES (1, '#FFFFFF', '#000000');
+""",
+        # 2: 인덱스
+        """
+CREATE INDEX IF NOT EXISTS idx_comments_feed ON comments(feed_type, feed_id, id);
+""",
+        # 3: 전문 검색 (FTS5 trigram)
+        fts_migration("feed_admin", ["content"])
+        + fts_migration("feed_fan", ["content", "writer"])
+        + fts_migration("chat", ["nickname", "message"]),
+        # 4: 짧은(2글자) 검색어용 어절 접두 검색
+        words_migration("feed_admin", ["content"])
+        + words_migration("feed_fan", ["content", "writer"])
+        + words_migration("chat", ["nickname", "message"]),
+    ]
+
+    db.migrate(MIGRATIONS)
+
+    # ================= SESSION =================
+    if "admin_logged_in" not in st.session_state:
+        st.session_state.admin_logged_in = False
+    if "feed_pages" not in st.session_state:
+        st.session_state.feed_pages = {"admin": 1, "fan": 1}
+
+    # ================= SIDEBAR =================
+    st.sidebar.subheader("🔐 관리자 로그인")
+
+    if not st.session_state.admin_logged_in:
+        uid = st.sidebar.text_input("아이디")
+        upw = st.sidebar.text_input("비밀번호", type="password")
+        if st.sidebar.button("로그인"):
+            if conn.execute(
+                "SELECT * FROM profile WHERE username=? AND password=?",
+                (uid, upw)
+            ).fetchone():
+                st.session_state.admin_logged_in = True
+                st.sidebar.success("로그인 성공")
+                st.rerun()
+            else:
+                st.sidebar.error("실패")
+    else:
+        st.sidebar.success("관리자 로그인 중")
+        hit = cache.stats()
+        st.sidebar.caption(f"캐시 hit {hit['hits']} / miss {hit['misses']}")
+        if st.sidebar.button("로그아웃"):
+            st.session_state.admin_logged_in = False
+            st.rerun()
+
+    # ================= TABS =================
+    tab_profile, tab_home, tab_admin, tab_fan, tab_chat, tab_search = st.tabs(
+        ["👤 프로필", "🏠 홈", "📝 관리자 피드", "📝 팬 피드", "💬 채팅", "🔍 검색"]
     )
 
-c.execute("SELECT * FROM chat_theme WHERE id=1")
-if not c.fetchone():
-    c.execute("INSERT INTO chat_theme VALUES (1,'#FFFFFF','#000000')")
-conn.commit()
-
-# ================= SESSION =================
-if "admin_logged_in" not in st.session_state:
-    st.session_state.admin_logged_in = False
-
-# ================= SIDEBAR =================
-st.sidebar.subheader("🔐 관리자 로그인")
-
-if not st.session_state.admin_logged_in:
-    uid = st.sidebar.text_input("아이디")
-    upw = st.sidebar.text_input("비밀번호", type="password")
-    if st.sidebar.button("로그인"):
-        c.execute(
-            "SELECT * FROM profile WHERE username=? AND password=?",
-            (uid, upw)
+    # ================= PROFILE =================
+    with tab_profile, prof.section("프로필"):
+        profile = cache.get(
+            "profile",
+            lambda: conn.execute("SELECT * FROM profile WHERE username='admin'").fetchone()
         )
-        if c.fetchone():
-            st.session_state.admin_logged_in = True
-            st.sidebar.success("로그인 성공")
-            st.rerun()
-        else:
-            st.sidebar.error("실패")
-else:
-    st.sidebar.success("관리자 로그인 중")
-    if st.sidebar.button("로그아웃"):
-        st.session_state.admin_logged_in = False
-        st.rerun()
-
-# ================= TABS =================
-tab_profile, tab_home, tab_admin, tab_fan, tab_chat = st.tabs(
-    ["👤 프로필", "🏠 홈", "📝 관리자 피드", "📝 팬 피드", "💬 채팅"]
-)
-
-# ================= PROFILE =================
-with tab_profile:
-    profile = c.execute("SELECT * FROM profile WHERE username='admin'").fetchone()
-    st.image(profile[2], width=150)
-    st.markdown(f"### {profile[0]}")
-    st.write(profile[1])
-
-    if st.session_state.admin_logged_in:
-        st.markdown("---")
-        bio = st.text_area("소개", profile[1])
-        img = st.text_input("프로필 이미지 URL", profile[2])
-        if st.button("프로필 저장"):
-            c.execute(
-                "UPDATE profile SET bio=?, profile_url=? WHERE username='admin'",
-                (bio, img)
-            )
-            conn.commit()
-            st.rerun()
+        st.image(profile[2], width=150)
+        st.markdown(f"### {profile[0]}")
+        st.write(profile[1])
+
+        if st.session_state.admin_logged_in:
+            st.markdown("---")
+            bio = st.text_area("소개", profile[1])
+            img = st.text_input("프로필 이미지 URL", profile[2])
+            if st.button("프로필 저장"):
+                with db.writer() as w:
+                    w.execute(
+                        "UPDATE profile SET bio=?, profile_url=? WHERE username='admin'",
+                        (bio, img)
+                    )
+                cache.invalidate("profile")
+                st.rerun()
 
-# ================= HOME =================
-with tab_home:
-    st.markdown("""
+    # ================= HOME =================
+    with tab_home, prof.section("홈"):
+        st.markdown("""
 - 🔗 유튜브  
 - 🔗 인스타그램  
 - 🔗 팬카페
     """)
 
-# ================= ADMIN FEED =================
-with tab_admin:
-    st.subheader("📌 관리자 피드")
+    # ================= ADMIN FEED =================
+    with tab_admin, prof.section("관리자 피드"):
+        st.subheader("📌 관리자 피드")
 
-    rows = c.execute("SELECT * FROM feed_admin ORDER BY id DESC").fetchall()
+        rows, comments, more = load_feed_pages(conn, "admin", st.session_state.feed_pages["admin"])
 
-    for fid, content, img, likes, writer, tm in rows:
-        st.markdown(f"**{writer} · {tm}**")
-        st.write(content)
-        if img:
-            st.image(img, width=300)
-
-        col1, col2 = st.columns([1,4])
-        if col1.button(f"❤️ {likes}", key=f"admin_like_{fid}"):
-            c.execute("UPDATE feed_admin SET likes=likes+1 WHERE id=?", (fid,))
-            conn.commit()
-            st.rerun()
+        for fid, content, img, likes, writer, tm in rows:
+            st.markdown(f"**{writer} · {tm}**")
+            st.write(content)
+            if img:
+                st.image(img, width=300)
 
-        comments = c.execute(
-            "SELECT nickname, comment FROM comments WHERE feed_type='admin' AND feed_id=?",
-            (fid,)
-        ).fetchall()
-
-        for n, cm in comments:
-            st.write(f"💬 **{n}**: {cm}")
-
-        nick = st.text_input("닉네임", key=f"an_{fid}")
-        cm = st.text_input("댓글", key=f"ac_{fid}")
-        if st.button("댓글 등록", key=f"ab_{fid}"):
-            if nick and cm:
-                c.execute(
-                    "INSERT INTO comments VALUES (NULL,'admin',?,?,?,?)",
-                    (fid, nick, cm, datetime.now().strftime("%H:%M"))
-                )
-                conn.commit()
+            col1, col2 = st.columns([1,4])
+            if col1.button(f"❤️ {likes}", key=f"admin_like_{fid}"):
+                with db.writer() as w:
+                    w.execute("UPDATE feed_admin SET likes=likes+1 WHERE id=?", (fid,))
                 st.rerun()
 
-        st.divider()
+            for n, cm in comments.get(("admin", fid), []):
+                st.write(f"💬 **{n}**: {cm}")
 
-    if st.session_state.admin_logged_in:
-        st.markdown("### ➕ 게시글 추가")
-        text = st.text_area("내용")
-        img = st.text_input("이미지 URL (선택)")
-        if st.button("게시"):
-            c.execute(
-                "INSERT INTO feed_admin VALUES (NULL,?,?,0,'admin',?)",
-                (text, img, datetime.now().strftime("%Y-%m-%d %H:%M"))
-            )
-            conn.commit()
+            nick = st.text_input("닉네임", key=f"an_{fid}")
+            cm = st.text_input("댓글", key=f"ac_{fid}")
+            if st.button("댓글 등록", key=f"ab_{fid}"):
+                if nick and cm:
+                    with db.writer() as w:
+                        w.execute(
+                            "INSERT INTO comments VALUES (NULL,'admin',?,?,?,?)",
+                            (fid, nick, cm, datetime.now().strftime("%H:%M"))
+                        )
+                    st.rerun()
+
+            st.divider()
+
+        if more is not None and st.button("더 보기", key="admin_more"):
+            st.session_state.feed_pages["admin"] += 1
             st.rerun()
 
-# ================= FAN FEED =================
-with tab_fan:
-    st.subheader("🫶 팬 피드")
+        if st.session_state.admin_logged_in:
+            st.markdown("### ➕ 게시글 추가")
+            text = st.text_area("내용")
+            img = st.text_input("이미지 URL (선택)")
+            if st.button("게시"):
+                with db.writer() as w:
+                    w.execute(
+                        "INSERT INTO feed_admin VALUES (NULL,?,?,0,'admin',?)",
+                        (text, img, datetime.now().strftime("%Y-%m-%d %H:%M"))
+                    )
+                st.rerun()
 
-    rows = c.execute("SELECT * FROM feed_fan ORDER BY id DESC").fetchall()
+    # ================= FAN FEED =================
+    with tab_fan, prof.section("팬 피드"):
+        st.subheader("🫶 팬 피드")
 
-    for fid, content, img, likes, writer, tm in rows:
-        st.markdown(f"**{writer} · {tm}**")
-        st.write(content)
-        if img:
-            st.image(img, width=300)
+        rows, comments, more = load_feed_pages(conn, "fan", st.session_state.feed_pages["fan"])
 
-        if st.button(f"❤️ {likes}", key=f"fan_like_{fid}"):
-            c.execute("UPDATE feed_fan SET likes=likes+1 WHERE id=?", (fid,))
-            conn.commit()
-            st.rerun()
+        for fid, content, img, likes, writer, tm in rows:
+            st.markdown(f"**{writer} · {tm}**")
+            st.write(content)
+            if img:
+                st.image(img, width=300)
 
-        comments = c.execute(
-            "SELECT nickname, comment FROM comments WHERE feed_type='fan' AND feed_id=?",
-            (fid,)
-        ).fetchall()
-
-        for n, cm in comments:
-            st.write(f"💬 **{n}**: {cm}")
-
-        nick = st.text_input("닉네임", key=f"fn_{fid}")
-        cm = st.text_input("댓글", key=f"fc_{fid}")
-        if st.button("댓글 등록", key=f"fb_{fid}"):
-            if nick and cm:
-                c.execute(
-                    "INSERT INTO comments VALUES (NULL,'fan',?,?,?,?)",
-                    (fid, nick, cm, datetime.now().strftime("%H:%M"))
-                )
-                conn.commit()
+            if st.button(f"❤️ {likes}", key=f"fan_like_{fid}"):
+                with db.writer() as w:
+                    w.execute("UPDATE feed_fan SET likes=likes+1 WHERE id=?", (fid,))
                 st.rerun()
 
-        st.divider()
-
-    st.markdown("### ✍ 팬 게시글 작성")
-    writer = st.text_input("이름")
-    text = st.text_area("내용")
-    img = st.text_input("이미지 URL")
-    if st.button("게시"):
-        if writer and text:
-            c.execute(
-                "INSERT INTO feed_fan VALUES (NULL,?,?,0,?,?)",
-                (text, img, writer, datetime.now().strftime("%Y-%m-%d %H:%M"))
-            )
-            conn.commit()
+            for n, cm in comments.get(("fan", fid), []):
+                st.write(f"💬 **{n}**: {cm}")
+
+            nick = st.text_input("닉네임", key=f"fn_{fid}")
+            cm = st.text_input("댓글", key=f"fc_{fid}")
+            if st.button("댓글 등록", key=f"fb_{fid}"):
+                if nick and cm:
+                    with db.writer() as w:
+                        w.execute(
+                            "INSERT INTO comments VALUES (NULL,'fan',?,?,?,?)",
+                            (fid, nick, cm, datetime.now().strftime("%H:%M"))
+                        )
+                    st.rerun()
+
+            st.divider()
+
+        if more is not None and st.button("더 보기", key="fan_more"):
+            st.session_state.feed_pages["fan"] += 1
             st.rerun()
 
-# ================= CHAT =================
-with tab_chat:
-    theme = c.execute("SELECT bg_color, text_color FROM chat_theme WHERE id=1").fetchone()
+        st.markdown("### ✍ 팬 게시글 작성")
+        writer = st.text_input("이름")
+        text = st.text_area("내용")
+        img = st.text_input("이미지 URL")
+        if st.button("게시"):
+            if writer and text:
+                with db.writer() as w:
+                    w.execute(
+                        "INSERT INTO feed_fan VALUES (NULL,?,?,0,?,?)",
+                        (text, img, writer, datetime.now().strftime("%Y-%m-%d %H:%M"))
+                    )
+                st.rerun()
 
-    rows = c.execute("SELECT nickname,message,time FROM chat ORDER BY id DESC LIMIT 50").fetchall()
-    for n, m, t in rows[::-1]:
-        st.markdown(
-            f"<div style='background:{theme[0]};color:{theme[1]};padding:6px;border-radius:6px;margin:4px'>[{t}] <b>{n}</b>: {m}</div>",
-            unsafe_allow_html=True
+    # ================= CHAT =================
+    with tab_chat, prof.section("채팅"):
+        theme = cache.get(
+            "chat_theme",
+            lambda: conn.execute("SELECT bg_color, text_color FROM chat_theme WHERE id=1").fetchone()
         )
 
-    nick = st.text_input("닉네임")
-    msg = st.text_input("메시지")
-    if st.button("전송"):
-        if nick and msg:
-            c.execute(
-                "INSERT INTO chat VALUES (NULL,?,?,?)",
-                (nick, msg, datetime.now().strftime("%H:%M"))
-            )
-            conn.commit()
-            st.rerun()
+        def load_chat_since(last_id, limit):
+            rows = db.reader().execute(
+                "SELECT id,nickname,message,time FROM chat WHERE id > ? ORDER BY id DESC LIMIT ?",
+                (last_id, limit)
+            ).fetchall()
+            return rows[::-1]
+
+        def fetch_chat_since(last_id, limit):
+            # 새 메시지는 버스(메모리)에서, 처음 열 때만 DB 에서
+            return bus.read(last_id, limit, load_chat_since)
+
+        # 채팅 영역만 주기적으로 갱신 (새 메시지만 조회)
+        @st.fragment(run_every=REFRESH)
+        def chat_view():
+            for _, n, m, t in chat_window("chat_rows", fetch_chat_since):
+                st.markdown(
+                    f"<div style='background:{theme[0]};color:{theme[1]};padding:6px;border-radius:6px;margin:4px'>[{t}] <b>{n}</b>: {m}</div>",
+                    unsafe_allow_html=True
+                )
 
-    if st.session_state.admin_logged_in:
-        st.markdown("### 🎨 채팅 테마")
-        bg = st.color_picker("배경", theme[0])
-        tc = st.color_picker("글자", theme[1])
-        if st.button("테마 변경"):
-            c.execute(
-                "UPDATE chat_theme SET bg_color=?, text_color=? WHERE id=1",
-                (bg, tc)
-            )
-            conn.commit()
-            st.rerun()
+        chat_view()
+
+        nick = st.text_input("닉네임")
+        msg = st.text_input("메시지")
+        if st.button("전송"):
+            if nick and msg:
+                tm = datetime.now().strftime("%H:%M")
+                with db.writer() as w:
+                    cur = w.execute(
+                        "INSERT INTO chat VALUES (NULL,?,?,?)",
+                        (nick, msg, tm)
+                    )
+                    bus.publish((cur.lastrowid, nick, msg, tm))
+                st.rerun()
+
+        if st.session_state.admin_logged_in:
+            st.markdown("### 🎨 채팅 테마")
+            bg = st.color_picker("배경", theme[0])
+            tc = st.color_picker("글자", theme[1])
+            if st.button("테마 변경"):
+                with db.writer() as w:
+                    w.execute(
+                        "UPDATE chat_theme SET bg_color=?, text_color=? WHERE id=1",
+                        (bg, tc)
+                    )
+                cache.invalidate("chat_theme")
+                st.rerun()
 
+    # ================= SEARCH =================
+    SEARCH_SCOPES = {
+        "팬 피드": "feed_fan",
+        "관리자 피드": "feed_admin",
+        "채팅": "chat",
+    }
+
+    with tab_search, prof.section("검색"):
+        scope = st.radio("검색 대상", list(SEARCH_SCOPES), horizontal=True)
+        table = SEARCH_SCOPES[scope]
+        results = search_box(conn, table, f"search_{table}")
+
+        for r in results or []:
+            if table == "chat":
+                st.markdown(f"[{html.escape(r[3] or '')}] **{html.escape(r[1] or '')}**: {r[-1]}", unsafe_allow_html=True)
+            else:
+                # 마크업은 스니펫(이미 이스케이프됨)만, 작성자 / 시각은 이스케이프
+                st.markdown(f"**{html.escape(r[4] or '')} · {html.escape(r[5] or '')}**  \n{r[-1]}", unsafe_allow_html=True)
+
+# ================= DEBUG =================
+profiler.debug_panel(prof, st.session_state.admin_logged_in)
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import profiler
+
+# ================= 부하 벤치마크 =================
+# AppTest 로 앱을 화면 없이 돌리면서 시나리오별 rerun 시간을 잰다.
+#   python bench.py --scale 100k --runs 20 --out bench-100k.json [--baseline bench-old.json]
+# 임시 폴더에 앱을 복사하고, 한 번 열어서 스키마를 만든 뒤 합성 데이터를 채운다.
+# 쿼리 수는 profiler 가 rerun 마다 남기는 profile.jsonl 줄에서 센다
+# (쓰기 rerun 은 st.rerun() 으로 끝나고 다시 그리는 rerun 이 이어지므로 동작 하나 = 보통 2줄).
+# 시나리오마다 새 프로세스(--worker)에서 돌려서 peak RSS 가 그 시나리오만의 값이 되게 한다.
+# 뜨지 않는 앱 / 죽은 워커는 건너뛰지 않고 "failed" 결과로 남긴다
+# (예: Privcht 는 f-string 안 역슬래시 때문에 Python 3.11 이하에서는 재지 못한다).
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+APPS = ["app.py", "1app.py", "Private-board", "Privcht", "4app.py"]
+SCRIPTS = {"Privcht": "12341234app.py"}
+DB_FILES = {
+    "app.py": "channel.db",
+    "1app.py": "chat.db",
+    "Private-board": "database.db",
+    "Privcht": "privcht.db",
+    "4app.py": "aouse.db",
+}
+WORDS = "오늘 콘서트 정말 최고였어요 사랑해요 다음 앨범 기대 무대 노래 hello world".split()
+
+
+def text(k=8):
+    return " ".join(random.choices(WORDS, k=k))
+
+
+# ---------- 합성 데이터 ----------
+def seed(app, conn, n):
+    rows = range(1, n + 1)
+    if app == "app.py":
+        conn.executemany("INSERT INTO feed_admin VALUES (NULL,?,NULL,0,'admin','2024-01-01 00:00')",
+                         ((text(),) for _ in range(max(n // 10, 1))))
+        conn.executemany("INSERT INTO feed_fan VALUES (NULL,?,NULL,0,?,'2024-01-01 00:00')",
+                         ((text(), f"fan{i % 500}") for i in rows))
+        conn.executemany("INSERT INTO comments VALUES (NULL,'fan',?,?,?,'00:00')",
+                         ((random.randint(1, n), f"fan{i % 500}", text(4)) for i in rows))
+        conn.executemany("INSERT INTO chat VALUES (NULL,?,?,'00:00')",
+                         ((f"fan{i % 500}", text(5)) for i in rows))
+    elif app == "1app.py":
+        conn.executemany("INSERT INTO messages (nickname, message, likes, time) VALUES (?,?,0,'00:00')",
+                         ((f"fan{i % 500}", text(5)) for i in rows))
+    elif app == "Private-board":
+        conn.executemany("INSERT INTO posts VALUES (NULL,?,?,NULL,0,?)",
+                         ((text(3), text(20), f"2024-01-01 00:00:{i:07d}") for i in rows))
+        conn.executemany("INSERT INTO comments VALUES (NULL,?,?,?,0,NULL)",
+                         ((random.randint(1, n), f"fan{i % 500}", text(4)) for i in rows))
+    elif app == "Privcht":
+        conn.execute("INSERT OR IGNORE INTO admins VALUES ('bench','bench','Bench',NULL)")
+        conn.executemany("INSERT INTO messages (content, image, time) VALUES (?,NULL,'2024-01-01 00:00')",
+                         ((text(),) for _ in rows))
+        conn.executemany("INSERT INTO replies VALUES (NULL,?,'bench',?,'2024-01-01 00:00')",
+                         ((i, text(4)) for i in range(1, n + 1, 2)))
+        conn.execute("UPDATE messages SET reply_count = (id % 2)")
+    elif app == "4app.py":
+        conn.executemany("INSERT INTO posts (id, author, text, image) VALUES (?,?,?,NULL)",
+                         ((f"p{i}", f"fan{i % 500}", text()) for i in rows))
+        conn.executemany("INSERT OR IGNORE INTO likes VALUES (?,?)",
+                         ((f"p{random.randint(1, n)}", f"fan{i % 500}") for i in rows))
+        conn.executemany("INSERT INTO comments (post_id, author, text) VALUES (?,?,?)",
+                         ((f"p{random.randint(1, n)}", f"fan{i % 500}", text(4)) for i in rows))
+        conn.execute("UPDATE posts SET like_count = (SELECT COUNT(*) FROM likes WHERE post_id = posts.id)")
+
+
+# ---------- 시나리오 ----------
+# 각 함수는 준비된 AppTest 에 동작 하나를 걸고 run() 까지 한다.
+def _by_label(elements, label, unkeyed=False):
+    # unkeyed: 같은 라벨의 key 달린 입력(댓글 닉네임 등) 말고 key 없는 것
+    return next(e for e in elements if e.label == label and not (unkeyed and e.key))
+
+
+def _by_key_prefix(elements, prefix):
+    return next(e for e in elements if (e.key or "").startswith(prefix))
+
+
+def _session(app, timeout):
+    at = AppTest.from_file(SCRIPTS.get(app, app), default_timeout=timeout)
+    if app == "1app.py":
+        at.session_state.nickname = "bench"
+    if app == "4app.py":
+        at.session_state.name = "bench"
+    return at
+
+
+SCENARIOS = {
+    "app.py": {
+        "like": lambda at: _by_key_prefix(at.button, "fan_like_").click().run(),
+        "comment": lambda at: (
+            _by_key_prefix(at.text_input, "fn_").input("bench"),
+            _by_key_prefix(at.text_input, "fc_").input(text(3)),
+            _by_key_prefix(at.button, "fb_").click().run(),
+        ),
+        "send chat": lambda at: (
+            _by_label(at.text_input, "닉네임", unkeyed=True).input("bench"),
+            _by_label(at.text_input, "메시지", unkeyed=True).input(text(3)),
+            _by_label(at.button, "전송").click().run(),
+        ),
+    },
+    "1app.py": {
+        "like": lambda at: _by_key_prefix(at.button, "like_").click().run(),
+        "send chat": lambda at: (
+            at.text_input(key="message_input").input(text(3)),
+            _by_label(at.button, "전송").click().run(),
+        ),
+    },
+    "Private-board": {
+        "comment": lambda at: (
+            _by_key_prefix(at.text_input, "w").input("bench"),
+            _by_key_prefix(at.text_input, "c").input(text(3)),
+            _by_key_prefix(at.button, "cb").click().run(),
+        ),
+    },
+    "Privcht": {
+        "send chat": lambda at: (
+            _by_label(at.text_area, "질문").input(text(3)),
+            at.button[-1].click().run(),
+        ),
+    },
+    "4app.py": {
+        "like": lambda at: _by_key_prefix(at.button, "p").click().run(),
+        "comment": lambda at: (
+            next(e for e in at.text_input if (e.key or "").endswith("_c")).input(text(3)),
+            next(e for e in at.button if (e.key or "").endswith("_s")).click().run(),
+        ),
+    },
+}
+
+
+# ---------- 측정 ----------
+def _db_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def _log_lines():
+    if not os.path.exists(profiler.LOG_FILE):
+        return []
+    with open(profiler.LOG_FILE, encoding="utf-8") as f:
+        return f.readlines()
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))]
+
+
+def _rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(app, scenario, runs, timeout):
+    # --worker 프로세스 안에서 돈다
+    db_path = DB_FILES[app]
+    size_before = _db_size(db_path)
+    rss_before = _rss_mb()
+    times, queries, reruns = [], [], []
+
+    for _ in range(runs):
+        at = _session(app, timeout)
+        if scenario != "open feed":
+            at.run()  # 세션을 연 상태에서 동작만 잰다
+        mark = len(_log_lines())
+        t = time.perf_counter()
+        if scenario == "open feed":
+            at.run()
+        else:
+            SCENARIOS[app][scenario](at)
+        times.append((time.perf_counter() - t) * 1000)
+        if at.exception:
+            raise RuntimeError(f"{app} / {scenario}: {at.exception[0].value}")
+
+        runs_logged = [json.loads(line) for line in _log_lines()[mark:]]
+        reruns.append(len(runs_logged))
+        queries.append(sum(c["calls"] for r in runs_logged for c in r["calls"]))
+
+    total_reruns = max(sum(reruns), 1)
+    return {
+        "app": app,
+        "scenario": scenario,
+        "runs": runs,
+        "p50_ms": round(_pct(times, 50), 2),
+        "p99_ms": round(_pct(times, 99), 2),
+        "queries_per_rerun": round(sum(queries) / total_reruns, 2),
+        "reruns_per_action": round(total_reruns / runs, 2),
+        "peak_rss_mb": round(_rss_mb(), 1),
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),  # import 이후 시나리오가 늘린 만큼
+        "db_growth_bytes": _db_size(db_path) - size_before,
+    }
+
+
+def failed(app, scenario, error):
+    return {"app": app, "scenario": scenario, "failed": True, "error": error}
+
+
+def run_worker(app, scenario, runs, timeout):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", app, scenario,
+         "--runs", str(runs), "--timeout", str(timeout)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return failed(app, scenario, lines[-1] if lines else f"exit code {proc.returncode}")
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {(r["app"], r["scenario"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}")
+    bad = 0
+    for r in results:
+        b = base.get((r["app"], r["scenario"]))
+        if r.get("failed") or (b and b.get("failed")):
+            # 어느 한쪽이라도 못 쟀으면 비교가 깨끗해 보이지 않게 드러낸다
+            bad += 1
+            print(f"  {r['app']:<14} {r['scenario']:<10} FAILED  "
+                  f"{r.get('error') or b.get('error')}")
+            continue
+        if b is None:
+            continue
+        print(f"  {r['app']:<14} {r['scenario']:<10} p50 {b['p50_ms']:>8.1f} -> {r['p50_ms']:>8.1f} ms"
+              f"  ({r['p50_ms'] / max(b['p50_ms'], 0.01):.2f}x)"
+              f"  queries {b['queries_per_rerun']} -> {r['queries_per_rerun']}")
+    return bad
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Streamlit 앱 부하 벤치마크 (AppTest)")
+    ap.add_argument("--scale", choices=SCALES, default="1k")
+    ap.add_argument("--apps", default=",".join(APPS))
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--timeout", type=float, default=120)
+    ap.add_argument("--out", default=None, help="결과 JSON 파일 (없으면 stdout)")
+    ap.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    ap.add_argument("--worker", nargs=2, metavar=("APP", "SCENARIO"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        # 준비된 작업 폴더(cwd)에서 시나리오 하나만 재고 결과를 stdout 마지막 줄로
+        sys.path.insert(0, os.getcwd())
+        for name in os.listdir("."):
+            if name.startswith(profiler.LOG_FILE):
+                os.remove(name)  # 이전 워커 로그 (회전 중에 줄 번호가 밀리지 않게)
+        print(json.dumps(measure(*args.worker, args.runs, args.timeout), ensure_ascii=False))
+        return
+
+    random.seed(0)
+    n = SCALES[args.scale]
+    src = os.path.dirname(os.path.abspath(__file__))
+    work = tempfile.mkdtemp(prefix="bench-")
+    for name in os.listdir(src):
+        if os.path.isfile(os.path.join(src, name)) and not name.endswith((".db", ".json", ".jsonl", ".log")):
+            shutil.copy(os.path.join(src, name), work)
+    os.chdir(work)
+    sys.path.insert(0, work)
+
+    results, errors = [], {}
+    for app in args.apps.split(","):
+        # 한 번 열어서 마이그레이션 -> 데이터 채우기
+        try:
+            with open(SCRIPTS.get(app, app), encoding="utf-8") as f:
+                compile(f.read(), app, "exec")
+            at = _session(app, args.timeout)
+            at.run()
+            if at.exception:
+                errors[app] = at.exception[0].message
+        except SyntaxError as e:
+            errors[app] = f"SyntaxError: {e.msg} (line {e.lineno})"
+        if app in errors:
+            # 이 파이썬에서 안 뜨는 앱: 시나리오마다 실패로 기록하고 넘어간다
+            print(f"{app}: FAILED ({errors[app]})", file=sys.stderr)
+            results += [failed(app, scenario, errors[app]) for scenario in ["open feed", *SCENARIOS[app]]]
+            continue
+        t = time.perf_counter()
+        conn = sqlite3.connect(DB_FILES[app])
+        with conn:
+            seed(app, conn, n)
+        conn.close()
+        print(f"{app}: seeded {n} rows in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+
+        for scenario in ["open feed", *SCENARIOS[app]]:
+            r = run_worker(app, scenario, args.runs, args.timeout)
+            results.append(r)
+            if r.get("failed"):
+                print(f"  {scenario:<10} FAILED ({r['error']})", file=sys.stderr)
+                continue
+            print(f"  {scenario:<10} p50 {r['p50_ms']:.1f} ms  p99 {r['p99_ms']:.1f} ms  "
+                  f"{r['queries_per_rerun']} queries/rerun", file=sys.stderr)
+
+    report = {
+        "scale": args.scale,
+        "rows": n,
+        "runs": args.runs,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+        "errors": errors,
+    }
+    out = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(os.path.join(src, args.out) if not os.path.isabs(args.out) else args.out, "w",
+                  encoding="utf-8") as f:
+            f.write(out)
+    else:
+        print(out)
+    bad = sum(1 for r in results if r.get("failed"))
+    if args.baseline:
+        bad = compare(results, args.baseline if os.path.isabs(args.baseline) else os.path.join(src, args.baseline))
+    shutil.rmtree(work, ignore_errors=True)
+    if bad:
+        print(f"\n{bad} scenario(s) FAILED", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
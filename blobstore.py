@@ -0,0 +1,178 @@
+import glob
+import hashlib
+import os
+import tempfile
+
+import streamlit as st
+
+from db import get_db
+from thumbs import BLOB_NAME
+
+
+CHUNK = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, size, limit):
+        super().__init__(f"파일이 너무 큽니다 ({limit // (1024 * 1024)} MB 까지)")
+        self.size = size
+        self.limit = limit
+
+
+# ================= 이미지 blob 저장소 =================
+# 내용의 SHA-256 을 키로 파일을 저장한다 (같은 사진은 한 번만 저장).
+# 문서(JSON / DB)에는 해시만 남기고, 그릴 때는 파일 경로를 st.image 에 그대로 넘긴다.
+#   blobs/ab/cd/abcd....   <- 디렉터리 하나에 파일이 몰리지 않게 2단계로 나눔
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data):
+        if not data:
+            return None  # 빈 파일은 저장하지 않음 (그릴 이미지 없음)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return digest
+
+    def spool(self, f, limit=None, chunk=CHUNK):
+        # 파일 객체를 chunk 단위로 임시 파일에 쓰면서 해시 -> (digest, size, tmp 경로).
+        # limit 을 넘으면 지우고 UploadTooLarge. 메모리는 chunk 만큼만 쓴다.
+        h = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".spool-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    block = f.read(chunk)
+                    if not block:
+                        break
+                    size += len(block)
+                    if limit is not None and size > limit:
+                        raise UploadTooLarge(size, limit)
+                    h.update(block)
+                    out.write(block)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return h.hexdigest(), size, tmp
+
+
+@st.cache_resource
+def get_blobs(root):
+    return BlobStore(root)
+
+
+# ================= 공유 업로드 저장소 (참조 카운트) =================
+# Privcht / Private-board 업로드용. 같은 내용은 한 번만 저장하고
+# 몇 개의 행이 가리키는지 세어 두었다가 0 이 되면 바로 지운다.
+# 카운트는 두 앱이 같이 쓰도록 <root>-refs.db 에 둔다 (uploads/ 밖이라 GC 대상 아님).
+MAX_SIZE = {
+    "image/png": 10 * 1024 * 1024,
+    "image/jpeg": 10 * 1024 * 1024,
+    "image/gif": 20 * 1024 * 1024,
+}
+DEFAULT_MAX_SIZE = 5 * 1024 * 1024
+
+REFS_MIGRATIONS = [
+    """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER,
+    mime TEXT,
+    refs INTEGER NOT NULL
+);
+""",
+    # uploadgc: 앱마다 (DB 파일, 참조 중인 업로드 경로를 돌려주는 쿼리) 를 등록
+    """
+CREATE TABLE IF NOT EXISTS gc_sources (
+    db TEXT PRIMARY KEY,
+    query TEXT NOT NULL
+);
+""",
+]
+
+
+class UploadStore(BlobStore):
+    def __init__(self, root):
+        super().__init__(root)
+        self.refs = get_db(f"{root}-refs.db")
+        self.refs.migrate(REFS_MIGRATIONS)
+
+    def save(self, file):
+        # streamlit UploadedFile -> 저장 경로 (DB 에 넣을 값)
+        mime = getattr(file, "type", None)
+        file.seek(0)
+        digest, size, tmp = self.spool(file, MAX_SIZE.get(mime, DEFAULT_MAX_SIZE))
+        path = self.path(digest)
+        try:
+            with self.refs.writer() as w:
+                # 카운트를 먼저 올려서 쓰기 락을 잡은 뒤 파일을 놓는다 (release 와 경합 방지)
+                w.execute(
+                    "INSERT INTO blobs VALUES (?,?,?,1) "
+                    "ON CONFLICT(digest) DO UPDATE SET refs = refs + 1",
+                    (digest, size, mime)
+                )
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return path
+
+    def release(self, path):
+        # 행을 지운 뒤 부른다. 이 저장소 파일이 아니면(예전 업로드) 무시 -> GC 가 처리.
+        # -> 회수한 바이트 수
+        if not path or not BLOB_NAME.fullmatch(os.path.basename(path)):
+            return 0
+        digest = os.path.basename(path)
+        freed = 0
+        with self.refs.writer() as w:
+            w.execute("UPDATE blobs SET refs = refs - 1 WHERE digest=?", (digest,))
+            row = w.execute("SELECT refs FROM blobs WHERE digest=?", (digest,)).fetchone()
+            if row and row[0] <= 0:
+                w.execute("DELETE FROM blobs WHERE digest=?", (digest,))
+                for f in [self.path(digest)] + glob.glob(self.path(digest) + ".w*"):
+                    try:
+                        freed += os.path.getsize(f)
+                        os.remove(f)
+                    except FileNotFoundError:
+                        pass
+        return freed
+
+
+@st.cache_resource
+def get_uploads(root):
+    return UploadStore(root)
+
+
+# ---------- channel_data.json 의 base64 이미지를 blob 으로 옮기기 (한 번만) ----------
+def migrate_b64_images(store, blobs):
+    if store.data.get("blobs_migrated"):
+        return
+    import base64
+
+    profile = store.data["profile"]
+    for name, p in list(profile.items()):
+        if p.get("profile_b64"):
+            digest = blobs.put(base64.b64decode(p["profile_b64"]))
+            store.apply("update", ["profile", name], {"profile_blob": digest, "profile_b64": None})
+
+    for feed in ("feed_admin", "feed_fan"):
+        for i, post in enumerate(store.data[feed]):
+            if post.get("image_b64"):
+                digest = blobs.put(base64.b64decode(post["image_b64"]))
+                store.apply("update", [feed, i], {"image_blob": digest, "image_b64": None})
+
+    store.apply("set", ["blobs_migrated"], True)
+    store.compact()
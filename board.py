@@ -0,0 +1,63 @@
+import sqlite3
+
+# ================= Private-board 데이터 접근 =================
+PAGE_SIZE = 20
+
+
+def load_posts_page(conn: sqlite3.Connection, after=None, limit: int = PAGE_SIZE):
+    # 정렬 순서(pinned DESC, created DESC, id DESC) 그대로 keyset 페이지를 가져온다.
+    # after 는 마지막으로 본 글의 (pinned, created, id) 커서.
+    if after is None:
+        posts = conn.execute(
+            "SELECT * FROM posts ORDER BY pinned DESC, created DESC, id DESC LIMIT ?",
+            (limit + 1,)
+        ).fetchall()
+    else:
+        posts = conn.execute(
+            "SELECT * FROM posts WHERE (pinned, created, id) < (?,?,?) "
+            "ORDER BY pinned DESC, created DESC, id DESC LIMIT ?",
+            (*after, limit + 1)
+        ).fetchall()
+
+    next_after = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        last = posts[-1]
+        next_after = (last[4], last[5], last[0])
+
+    return posts, next_after
+
+
+def load_posts_pages(conn: sqlite3.Connection, pages: int, limit: int = PAGE_SIZE):
+    # "더 보기" 로 펼친 페이지들을 커서를 따라 이어 붙인다.
+    posts, after = [], None
+    for _ in range(pages):
+        page, after = load_posts_page(conn, after, limit)
+        posts += page
+        if after is None:
+            break
+    return posts, after
+
+
+def load_comment_trees(conn: sqlite3.Connection, post_ids):
+    # 페이지 안 글들의 댓글 전부를 쿼리 1번으로 읽어서 글별 트리로 만든다.
+    # -> {post_id: [{"row": 댓글 행, "replies": [...]}, ...]}
+    # (post_id, parent_id, id) 인덱스 순서라 같은 부모의 답글은 id 순으로 나온다.
+    trees = {pid: [] for pid in post_ids}
+    if not post_ids:
+        return trees
+
+    marks = ",".join("?" * len(post_ids))
+    rows = conn.execute(
+        f"SELECT * FROM comments WHERE post_id IN ({marks}) ORDER BY post_id, parent_id, id",
+        tuple(post_ids)
+    ).fetchall()
+
+    nodes = {r[0]: {"row": r, "replies": []} for r in rows}
+    for r in rows:
+        parent = nodes.get(r[5]) if r[5] is not None else None
+        if parent is not None:
+            parent["replies"].append(nodes[r[0]])
+        elif r[5] is None:
+            trees[r[1]].append(nodes[r[0]])
+    return trees
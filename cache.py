@@ -0,0 +1,45 @@
+import threading
+
+import streamlit as st
+
+
+# ================= 읽기 캐시 =================
+# 프로필 / 채팅 테마 처럼 거의 안 바뀌는 행을 프로세스 안 모든 세션이 공유한다.
+# 쓰기 핸들러가 커밋 후 invalidate() 를 부르면 다음 읽기에서 한 번만 다시 읽는다.
+class ReadCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self._gen = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            gen = self._gen.get(key, 0)
+
+        value = load()
+
+        with self._lock:
+            # 읽는 도중 invalidate 됐으면 옛 값을 넣지 않는다
+            if self._gen.get(key, 0) == gen:
+                self._data[key] = value
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._gen[key] = self._gen.get(key, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+@st.cache_resource
+def get_cache(name):
+    return ReadCache()
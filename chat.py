@@ -0,0 +1,23 @@
+from collections import deque
+
+import streamlit as st
+
+# ================= 채팅 증분 갱신 =================
+# 채팅 영역만 fragment 로 주기적으로 다시 그린다 (다른 탭은 그대로).
+# 세션마다 마지막으로 본 id 를 기억하고 그 뒤의 메시지만 가져온다.
+REFRESH = "2s"
+WINDOW = 50
+
+
+def chat_window(key, fetch_since, limit=WINDOW):
+    # fetch_since(last_id, limit) -> id 오름차순 [(id, ...), ...]
+    # 처음(last_id=0)에는 최근 limit 개, 이후에는 새 메시지만.
+    state = st.session_state.get(key)
+    if state is None:
+        state = st.session_state[key] = {"last_id": 0, "rows": deque(maxlen=limit)}
+
+    rows = fetch_since(state["last_id"], limit)
+    if rows:
+        state["rows"].extend(rows)
+        state["last_id"] = rows[-1][0]
+    return state["rows"]
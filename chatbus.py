@@ -0,0 +1,50 @@
+import threading
+from collections import deque
+
+import streamlit as st
+
+
+# ================= 채팅 방송 버스 =================
+# 서버 프로세스 안 모든 세션이 공유하는 최근 메시지 링 버퍼.
+# - 쓰는 쪽: INSERT 직후 (writer 락 안에서) publish(row) -> id 순서 보장
+# - 읽는 쪽: 마지막으로 본 id 이후를 메모리에서 가져간다.
+#   처음 열었을 때(last_id=0)나 버퍼보다 뒤처졌을 때만 DB 를 읽는다.
+class ChatBus:
+    def __init__(self, size=500):
+        self._lock = threading.Lock()
+        self._ring = deque(maxlen=size)
+        self.hits = 0
+        self.misses = 0
+
+    def publish(self, row):
+        with self._lock:
+            self._ring.append(row)
+
+    def seed(self, rows):
+        # DB 에서 읽은 행 중 버퍼 끝보다 새 것만 채운다
+        with self._lock:
+            last = self._ring[-1][0] if self._ring else 0
+            self._ring.extend(r for r in rows if r[0] > last)
+
+    def since(self, last_id):
+        # 버퍼로 답할 수 없으면 None
+        with self._lock:
+            if not self._ring or last_id < self._ring[0][0] - 1:
+                return None
+            return [r for r in self._ring if r[0] > last_id]
+
+    def read(self, last_id, limit, load):
+        # load(last_id, limit) 는 DB 에서 id 오름차순으로 읽는 함수
+        rows = self.since(last_id) if last_id else None
+        if rows is None:
+            self.misses += 1
+            rows = load(last_id, limit)
+            self.seed(rows)
+        else:
+            self.hits += 1
+        return rows[-limit:]
+
+
+@st.cache_resource
+def get_bus(name):
+    return ChatBus()
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+from profiler import wrap
+
+
+# ================= SQLite 연결 풀 =================
+# 프로세스 전체에서 DB 파일 하나당 Database 하나를 공유한다.
+# - 쓰기: 전용 writer 연결 하나 + 락 으로 직렬화
+# - 읽기: 스레드마다 연결 하나 (WAL 이라 쓰기 중에도 막히지 않음)
+# rerun 프로파일 중이면 profiler 가 연결을 감싸서 쿼리 시간을 잰다.
+class Database:
+    def __init__(self, path):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._local = threading.local()
+        self._idle = deque()
+        self.version = self._writer.execute("PRAGMA user_version").fetchone()[0]
+
+    def _connect(self, readonly=False):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        if readonly:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def migrate(self, migrations):
+        # migrations[i] 는 user_version i -> i+1 단계 (SQL 스크립트 또는 conn 을 받는 함수).
+        # 프로세스 시작 후 첫 rerun 에서만 실제로 돌고, 이후에는 버전 비교만 한다.
+        # 단계마다 BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡고 버전을 다시 읽어서,
+        # 같은 DB 를 여는 다른 프로세스가 이미 올린 단계는 건너뛴다.
+        if self.version >= len(migrations):
+            return
+        with self._write_lock:
+            conn = self._writer
+            for n, step in enumerate(migrations, start=1):
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if conn.execute("PRAGMA user_version").fetchone()[0] >= n:
+                        conn.rollback()
+                        continue
+                    if callable(step):
+                        step(conn)
+                    else:
+                        for sql in _statements(step):
+                            conn.execute(sql)
+                    conn.execute(f"PRAGMA user_version={n}")
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+            self.version = len(migrations)
+
+    def reader(self):
+        lease = getattr(self._local, "lease", None)
+        if lease is None:
+            conn = self._idle.pop() if self._idle else self._connect(readonly=True)
+            lease = self._local.lease = _Lease(self._idle, conn)
+        return wrap(lease.conn)
+
+    @contextmanager
+    def writer(self):
+        with self._write_lock:
+            try:
+                yield wrap(self._writer)
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+
+def _statements(script):
+    # SQL 스크립트 -> 문장 하나씩. ; 로 자르되 문자열 / 트리거(BEGIN ... END) 안의 ; 는
+    # complete_statement 가 False 라서 다음 조각과 이어 붙는다.
+    buf = ""
+    for part in script.split(";"):
+        buf += part + ";"
+        if sqlite3.complete_statement(buf):
+            yield buf
+            buf = ""
+
+
+class _Lease:
+    # 스크립트 스레드가 끝나면 thread-local 과 함께 사라지면서
+    # 읽기 연결을 풀에 돌려준다 (rerun 마다 connect 하지 않도록).
+    def __init__(self, idle, conn):
+        self.idle = idle
+        self.conn = conn
+
+    def __del__(self):
+        self.idle.append(self.conn)
+
+
+@st.cache_resource
+def get_db(path):
+    return Database(path)
+
+
+# ---------- 동시 마이그레이션 확인 ----------
+# python db.py [프로세스 수]  -> 여러 프로세스가 같은 DB 에 같은 단계를 동시에 올려도 한 번만 적용
+_RACE_STEPS = [
+    "CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, a TEXT); INSERT INTO t (a) VALUES ('x');",
+    "ALTER TABLE t ADD COLUMN c INTEGER NOT NULL DEFAULT 0;",
+    lambda conn: conn.execute("INSERT INTO t (a) VALUES ('y')"),
+]
+
+
+def _race(path, barrier):
+    db = Database(path)
+    barrier.wait()
+    db.migrate(_RACE_STEPS)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    from multiprocessing import Barrier, Process
+
+    procs = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    path = os.path.join(tempfile.mkdtemp(), "race.db")
+    barrier = Barrier(procs)
+    ps = [Process(target=_race, args=(path, barrier)) for _ in range(procs)]
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join()
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    ok = all(p.exitcode == 0 for p in ps) and rows == 2
+    print(f"migrate: {procs} processes, exit codes {[p.exitcode for p in ps]}, rows={rows} "
+          f"({'OK' if ok else 'FAILED'})")
+    if not ok:
+        sys.exit(1)
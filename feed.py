@@ -0,0 +1,54 @@
+import sqlite3
+
+# ================= FEED 데이터 접근 =================
+# feed_type -> 테이블
+FEED_TABLES = {"admin": "feed_admin", "fan": "feed_fan"}
+PAGE_SIZE = 20
+
+
+def load_feed_page(conn: sqlite3.Connection, feed_type: str, before_id=None, limit: int = PAGE_SIZE):
+    # 게시글 한 페이지 + 해당 댓글 전체를 쿼리 2번으로 가져온다.
+    # 댓글은 (feed_type, feed_id) 로 묶어서 돌려준다.
+    # before_id 는 keyset 커서: 마지막으로 본 id 보다 작은 글만 가져온다.
+    table = FEED_TABLES[feed_type]
+    if before_id is None:
+        posts = conn.execute(
+            f"SELECT * FROM {table} ORDER BY id DESC LIMIT ?",
+            (limit + 1,)
+        ).fetchall()
+    else:
+        posts = conn.execute(
+            f"SELECT * FROM {table} WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (before_id, limit + 1)
+        ).fetchall()
+
+    # 한 줄 더 읽어서 다음 페이지가 있는지 확인
+    next_before = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_before = posts[-1][0]
+
+    comments = {}
+    if posts:
+        # 페이지는 id 연속 구간이라 BETWEEN 한 번이면 끝 (comments 인덱스 사용)
+        rows = conn.execute(
+            "SELECT feed_id, nickname, comment FROM comments "
+            "WHERE feed_type=? AND feed_id BETWEEN ? AND ? ORDER BY feed_id, id",
+            (feed_type, posts[-1][0], posts[0][0])
+        ).fetchall()
+        for fid, n, cm in rows:
+            comments.setdefault((feed_type, fid), []).append((n, cm))
+
+    return posts, comments, next_before
+
+
+def load_feed_pages(conn: sqlite3.Connection, feed_type: str, pages: int, limit: int = PAGE_SIZE):
+    # "더 보기" 로 펼친 페이지들을 커서를 따라 이어 붙인다.
+    posts, comments, before = [], {}, None
+    for _ in range(pages):
+        page, page_comments, before = load_feed_page(conn, feed_type, before, limit)
+        posts += page
+        comments.update(page_comments)
+        if before is None:
+            break
+    return posts, comments, before
@@ -0,0 +1,223 @@
+from datetime import datetime, timedelta
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, NotFound
+
+# ======================
+# AOUSE posts (Firestore)
+# ======================
+# 2app.py 타임라인용 데이터 접근. db 는 firestore 클라이언트
+# (에뮬레이터 / 가짜 클라이언트를 넘겨서 테스트할 수 있게 인자로 받는다).
+PAGE_SIZE = 10
+
+# 목록에는 배열(likes, comments) 대신 개수만 가져온다
+LIST_FIELDS = ["user_id", "nickname", "badge", "text", "image", "time", "like_count", "comment_count"]
+
+
+def load_timeline_page(db, after=None, limit=PAGE_SIZE):
+    # after: 이전 페이지 마지막 문서 스냅샷 (start_after 커서)
+    q = (
+        db.collection("posts")
+        .order_by("time", direction=firestore.Query.DESCENDING)
+        .select(LIST_FIELDS)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        q = q.start_after(after)
+
+    docs = list(q.stream())
+    next_after = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_after = docs[-1]
+    return docs, next_after
+
+
+def load_timeline_pages(db, pages, limit=PAGE_SIZE):
+    # "more" 로 펼친 페이지들을 커서를 따라 이어 붙인다
+    docs, after = [], None
+    for _ in range(pages):
+        page, after = load_timeline_page(db, after, limit)
+        docs += page
+        if after is None:
+            break
+    return docs, after
+
+
+# 글 수 -> 뱃지 (users.post_count 로 계산)
+BADGES = [(30, "ICON"), (15, "CREATOR"), (5, "ACTIVE")]
+
+
+def badge_for(count):
+    for n, badge in BADGES:
+        if count >= n:
+            return badge
+    return "FRIEND"
+
+
+def create_post(db, uid, post):
+    # 글 추가 + users.post_count 증가 + 뱃지 갱신을 한 트랜잭션으로.
+    # 읽기는 users 문서 하나뿐이라 글이 몇 개든 비용이 같다.
+    user_ref = db.collection("users").document(uid)
+    post_ref = db.collection("posts").document()
+
+    @firestore.transactional
+    def run(tx):
+        user = user_ref.get(field_paths=["post_count"], transaction=tx)
+        count = (user.to_dict() or {}).get("post_count", 0) + 1
+        badge = badge_for(count)
+        tx.set(post_ref, post)
+        tx.update(user_ref, {"post_count": count, "badge": badge})
+        return count, badge
+
+    return run(db.transaction())
+
+
+def load_comments(db, post_id):
+    # 댓글은 펼쳤을 때만 읽는다. posts/{id}/comments 하나를 시간순으로 읽고
+    # parent 가 있는 것(답글)은 메모리에서 부모 밑에 붙인다.
+    rows = []
+    q = db.collection("posts").document(post_id).collection("comments").order_by("time")
+    for c in q.stream():
+        d = c.to_dict()
+        d["id"] = c.id
+        d["replies"] = []
+        rows.append(d)
+
+    by_id = {d["id"]: d for d in rows if not d.get("parent")}
+    for d in rows:
+        if d.get("parent") in by_id:
+            by_id[d["parent"]]["replies"].append(d)
+    return [d for d in rows if not d.get("parent")]
+
+
+def add_comment(db, post_id, nickname, text, parent=None):
+    # 댓글/답글 한 건 = 작은 문서 하나. 게시글에는 comment_count 만 더한다.
+    post_ref = db.collection("posts").document(post_id)
+    batch = db.batch()
+    batch.set(post_ref.collection("comments").document(), {
+        "nickname": nickname,
+        "text": text,
+        "parent": parent,
+        "time": datetime.now()
+    })
+    if parent is None:
+        batch.update(post_ref, {"comment_count": firestore.Increment(1)})
+    batch.commit()
+
+
+def liked_posts(db, post_ids, uid):
+    # 페이지 글들의 내 좋아요 여부를 get_all 한 번으로 (likes/{uid} 문서 존재 여부)
+    refs = [db.collection("posts").document(pid).collection("likes").document(uid) for pid in post_ids]
+    if not refs:
+        return set()
+    return {s.reference.parent.parent.id for s in db.get_all(refs) if s.exists}
+
+
+def toggle_like(db, post_id, uid):
+    # 좋아요 = posts/{id}/likes/{uid} 문서 + like_count 증가.
+    # create / delete(exists) 전제조건이 중복 누름을 막아 주므로 게시글을
+    # 읽거나 잠글 필요가 없다 (Increment 는 서버에서 더함).
+    post_ref = db.collection("posts").document(post_id)
+    like_ref = post_ref.collection("likes").document(uid)
+    liked = like_ref.get().exists
+
+    batch = db.batch()
+    if liked:
+        batch.delete(like_ref, option=db.write_option(exists=True))
+        batch.update(post_ref, {"like_count": firestore.Increment(-1)})
+    else:
+        batch.create(like_ref, {"time": datetime.now()})
+        batch.update(post_ref, {"like_count": firestore.Increment(1)})
+    try:
+        batch.commit()
+    except (AlreadyExists, NotFound):
+        pass  # 다른 탭에서 먼저 눌렀음 -> 이미 원하는 상태
+    return not liked
+
+
+def backfill_post_counters(db):
+    # 예전 문서에 like_count / comment_count 채우기 (한 번만 돌리면 됨)
+    for p in db.collection("posts").stream():
+        d = p.to_dict()
+        if "like_count" in d and "comment_count" in d:
+            continue
+        p.reference.update({
+            "like_count": len(d.get("likes", [])),
+            "comment_count": len(d.get("comments", []))
+        })
+
+
+def migrate_comment_arrays(db):
+    # 예전 comments 배열 -> comments 하위 컬렉션 (한 번만 돌리면 됨)
+    for p in db.collection("posts").select(["comments", "time"]).stream():
+        old = p.to_dict().get("comments")
+        if not old:
+            continue
+        col = p.reference.collection("comments")
+        # 예전 댓글엔 시각이 없어서 게시 시각 + 순번으로 순서만 살린다
+        t = p.to_dict().get("time") or datetime.now()
+        writes = []
+        for c in old:
+            writes.append((col.document(c["id"]), {
+                "nickname": c["nickname"], "text": c["text"], "parent": None,
+                "time": t + timedelta(microseconds=len(writes) + 1)
+            }))
+            for j, r in enumerate(c.get("replies", [])):
+                writes.append((col.document(f"{c['id']}-r{j}"), {
+                    "nickname": r["nickname"], "text": r["text"], "parent": c["id"],
+                    "time": t + timedelta(microseconds=len(writes) + 1)
+                }))
+        for i in range(0, len(writes), 400):  # 배치 한도 500
+            batch = db.batch()
+            for ref, data in writes[i:i + 400]:
+                batch.set(ref, data)
+            batch.commit()
+        # 배열은 전부 옮긴 뒤에 지운다 (중간에 죽으면 다시 돌려도 같은 문서를 덮어씀)
+        p.reference.update({"comments": firestore.DELETE_FIELD, "comment_count": len(old)})
+
+
+def migrate_like_arrays(db):
+    # 예전 likes 배열 -> likes 하위 컬렉션 + like_count (한 번만 돌리면 됨)
+    for p in db.collection("posts").select(["likes"]).stream():
+        old = p.to_dict().get("likes")
+        if old is None:
+            continue
+        uids = list(dict.fromkeys(old))  # 중복 제거
+        for i in range(0, len(uids), 400):  # 배치 한도 500
+            batch = db.batch()
+            for uid in uids[i:i + 400]:
+                batch.set(p.reference.collection("likes").document(uid), {"time": None})
+            batch.commit()
+        p.reference.update({"likes": firestore.DELETE_FIELD, "like_count": len(uids)})
+
+
+def backfill_post_counts(db):
+    # users.post_count 채우기: posts 를 user_id 만 한 번 훑어서 센다
+    counts = {}
+    for p in db.collection("posts").select(["user_id"]).stream():
+        uid = p.to_dict().get("user_id")
+        counts[uid] = counts.get(uid, 0) + 1
+
+    batch, n = db.batch(), 0
+    for u in db.collection("users").select(["post_count"]).stream():
+        c = counts.get(u.id, 0)
+        batch.update(u.reference, {"post_count": c, "badge": badge_for(c)})
+        n += 1
+        if n % 400 == 0:  # 배치 한도 500
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+
+
+if __name__ == "__main__":
+    # python fs_posts.py  -> 예전 문서 / 유저 카운터 백필
+    import firebase_admin
+    from firebase_admin import credentials
+
+    firebase_admin.initialize_app(credentials.Certificate("serviceAccountKey.json"))
+    client = firestore.client()
+    backfill_post_counters(client)
+    migrate_comment_arrays(client)
+    migrate_like_arrays(client)
+    backfill_post_counts(client)
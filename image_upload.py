@@ -0,0 +1,186 @@
+import os
+import shutil
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from PIL import Image
+
+from thumbs import FORMAT, EXT
+
+
+# ================= 이미지 업로드 =================
+# 업로드 버퍼를 그대로 스트리밍해서 올린다 (PNG 로 다시 굽지 않음).
+# - JPEG / WebP / GIF / 작은 PNG 는 픽셀 그대로, 메타데이터(EXIF / XMP)만 뗀다
+# - 큰 불투명 PNG(스크린샷 말고 사진인 경우가 대부분)만 WebP 로 변환
+# 업로드는 스레드 풀에서 돌고, 공개 URL 은 미리 알 수 있어서
+# 글 문서를 쓰는 동안 같이 진행된다.
+KEEP = {"JPEG": ("image/jpeg", "jpg"), "WEBP": ("image/webp", "webp"), "GIF": ("image/gif", "gif")}
+PNG_TRANSCODE_OVER = 256 * 1024
+
+
+def prepare(file):
+    # -> (읽을 파일 객체, content_type, 확장자). 헤더만 읽어서 형식을 본다.
+    file.seek(0)
+    with Image.open(file) as img:
+        fmt = img.format
+        if fmt == "JPEG":
+            return (strip_jpeg(file, img.getexif().get(ORIENTATION)),) + KEEP[fmt]
+        if fmt == "WEBP":
+            return (strip_webp(file),) + KEEP[fmt]
+        if fmt == "GIF":
+            file.seek(0)  # GIF 에는 EXIF 가 없다
+            return (file,) + KEEP[fmt]
+
+        size = file.seek(0, os.SEEK_END)
+        opaque = img.mode in ("RGB", "L", "P") and "transparency" not in img.info
+        if fmt == "PNG" and not (opaque and size > PNG_TRANSCODE_OVER):
+            return strip_png(file), "image/png", "png"
+
+        # 나머지(큰 PNG, BMP 등)는 변환
+        out = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+        img = img.convert("RGBA" if FORMAT == "WEBP" and not opaque else "RGB")
+        img.save(out, format=FORMAT, quality=85)
+        out.seek(0)
+        return out, f"image/{FORMAT.lower()}", EXT
+
+
+# ---------- 메타데이터 제거 (다시 인코딩하지 않음) ----------
+# 원본이 공개 URL 로 올라가므로 카메라 EXIF(GPS 위치, 기기 정보), XMP, 텍스트 청크를
+# 세그먼트 / 청크 단위로 걸러서 복사한다. JPEG 은 회전 정보(Orientation)만 새 EXIF 로 남긴다.
+ORIENTATION = 0x0112
+JPEG_DROP = {0xE1, 0xED, 0xFE}  # APP1(EXIF / XMP), APP13(IPTC), COM
+PNG_DROP = {b"eXIf", b"tEXt", b"zTXt", b"iTXt", b"tIME"}
+WEBP_DROP = {b"EXIF", b"XMP "}
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+
+
+def strip_jpeg(file, orientation=None):
+    file.seek(0)
+    out = _spool()
+    out.write(file.read(2))  # SOI
+    if orientation and orientation != 1:
+        exif = Image.Exif()
+        exif[ORIENTATION] = orientation
+        data = exif.tobytes()
+        out.write(b"\xff\xe1" + struct.pack(">H", len(data) + 2) + data)
+    while True:
+        b = file.read(1)
+        if not b:
+            break
+        if b != b"\xff":
+            out.write(b)  # 잘못된 파일: 나머지는 그대로
+            shutil.copyfileobj(file, out)
+            break
+        marker = file.read(1)
+        while marker == b"\xff":  # 채움 바이트
+            marker = file.read(1)
+        m = marker[0] if marker else 0xD9
+        if m == 0xDA:  # SOS: 여기부터 압축 데이터 -> 끝까지 그대로
+            out.write(b"\xff" + marker)
+            shutil.copyfileobj(file, out)
+            break
+        if m == 0xD9 or m == 0x01 or 0xD0 <= m <= 0xD7:  # 길이 없는 마커
+            out.write(b"\xff" + marker)
+            continue
+        head = file.read(2)
+        body = file.read(struct.unpack(">H", head)[0] - 2)
+        if m not in JPEG_DROP:
+            out.write(b"\xff" + marker + head + body)
+    out.seek(0)
+    return out
+
+
+def strip_png(file):
+    file.seek(0)
+    out = _spool()
+    out.write(file.read(8))  # 시그니처
+    while True:
+        head = file.read(8)
+        if len(head) < 8:
+            break
+        length, kind = struct.unpack(">I4s", head)
+        body = file.read(length + 4)  # + CRC
+        if kind not in PNG_DROP:
+            out.write(head + body)
+        if kind == b"IEND":
+            break
+    out.seek(0)
+    return out
+
+
+def strip_webp(file):
+    file.seek(0)
+    file.read(12)  # RIFF <크기> WEBP
+    out = _spool()
+    out.write(b"RIFF\0\0\0\0WEBP")
+    while True:
+        head = file.read(8)
+        if len(head) < 8:
+            break
+        kind, length = struct.unpack("<4sI", head)
+        body = file.read(length + (length & 1))  # 홀수 길이는 한 바이트 채움
+        if kind in WEBP_DROP:
+            continue
+        if kind == b"VP8X":  # 확장 헤더의 EXIF / XMP 플래그도 끈다
+            body = bytes([body[0] & ~0x0C]) + body[1:]
+        out.write(head + body)
+    size = out.tell() - 8
+    out.seek(4)
+    out.write(struct.pack("<I", size))
+    out.seek(0)
+    return out
+
+
+class Uploader:
+    def __init__(self, bucket, workers=4):
+        self.bucket = bucket
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload")
+
+    def submit(self, name, file):
+        # name 은 확장자 없이 ("posts/<uuid>"). -> (공개 URL, future)
+        # 공개 읽기는 업로드 요청에 ACL 로 같이 보낸다 (make_public 왕복 없음).
+        f, content_type, ext = prepare(file)
+        blob = self.bucket.blob(f"{name}.{ext}")
+        fut = self._pool.submit(
+            blob.upload_from_file, f, content_type=content_type, predefined_acl="publicRead"
+        )
+        return blob.public_url, fut
+
+
+# ---------- 로컬 버킷 (테스트 / 오프라인용) ----------
+# google.cloud.storage.Bucket 중 Uploader 가 쓰는 부분만 흉내 낸다.
+class LocalBlob:
+    def __init__(self, root, name):
+        self.path = os.path.join(root, name)
+        self.public_url = self.path
+
+    def upload_from_file(self, f, content_type=None, predefined_acl=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(f, out)
+        os.replace(tmp, self.path)
+
+
+class LocalBucket:
+    def __init__(self, root):
+        self.root = root
+
+    def blob(self, name):
+        return LocalBlob(self.root, name)
+
+
+@st.cache_resource
+def get_uploader(bucket_name=None):
+    # 버킷 이름이 캐시 키. None 이면 firebase 앱의 기본 버킷(storageBucket),
+    # "local:<폴더>" 면 LocalBucket.
+    if bucket_name and bucket_name.startswith("local:"):
+        return Uploader(LocalBucket(bucket_name[len("local:"):]))
+    from firebase_admin import storage
+
+    return Uploader(storage.bucket(bucket_name))
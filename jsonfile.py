@@ -0,0 +1,150 @@
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+# ================= JSON 파일 안전하게 쓰기 =================
+# - 쓰기: 같은 폴더 임시 파일에 쓰고 fsync -> rename (반쯤 쓴 파일이 보이지 않음)
+# - 읽고-고치고-쓰기: <path>.lock 에 fcntl 잠금을 잡고 최신 내용을 다시 읽은 뒤 고친다
+#   (여러 프로세스 / 세션이 동시에 써도 서로 덮어쓰지 않고 합쳐짐)
+@contextmanager
+def locked(path, shared=False):
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_json(path, default=None):
+    # 파일이 없을 때만 default. 깨진 파일은 조용히 초기화하지 않고 예외를 낸다.
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_atomic(path, data):
+    folder = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    # rename 자체도 디스크에 남도록 폴더 fsync
+    dfd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(dfd)
+    finally:
+        os.close(dfd)
+
+
+def update_json(path, mutate, default=None):
+    # 잠금 안에서 최신 내용 읽기 -> mutate(data) -> 원자적 쓰기. 고친 data 를 돌려준다.
+    with locked(path):
+        data = read_json(path, default)
+        mutate(data)
+        write_json_atomic(path, data)
+        return data
+
+
+# ---------- 동시 쓰기 스트레스 실행 ----------
+# python jsonfile.py [프로세스 수] [프로세스당 쓰기 수]
+def _stress_json(path, n):
+    for i in range(n):
+        update_json(path, lambda d: (d.__setitem__("count", d["count"] + 1),
+                                     d["items"].append(os.getpid())), {"count": 0, "items": []})
+
+
+def _stress_log(path, n):
+    from logstore import LogStore
+
+    store = LogStore(path, {"count": 0, "items": []}, compact_every=50)
+    for i in range(n):
+        store.apply("incr", ["count"], 1)
+        store.apply("append", ["items"], os.getpid())
+
+
+def _check_torn_log(folder):
+    # 쓰다 만 마지막 줄이 남은 로그: 재시작 후 쓴 값이 다음 재시작에도 남아 있어야 한다
+    from logstore import LogStore
+
+    path = os.path.join(folder, "torn.json")
+    LogStore(path, {"chat": []}).apply("append", ["chat"], "a")
+    with open(os.path.splitext(path)[0] + ".log", "ab") as f:
+        f.write(b'{"seq": 2, "op": "app')
+    store = LogStore(path, {"chat": []})
+    store.apply("append", ["chat"], "b")
+    store.apply("append", ["chat"], "c")
+    data = LogStore(path, {"chat": []}).data
+    ok = data["chat"] == ["a", "b", "c"]
+    print(f"LogStore torn tail: {data['chat']} ({'OK' if ok else 'LOST WRITES'})")
+    return ok
+
+
+def _check_corrupt_log(folder):
+    # 줄 끝까지 쓰였는데 깨진 줄: 잘라내지 말고 예외, 파일은 그대로
+    from logstore import LogStore
+
+    path = os.path.join(folder, "corrupt.json")
+    store = LogStore(path, {"chat": []})
+    store.apply("append", ["chat"], "a")
+    log_path = os.path.splitext(path)[0] + ".log"
+    with open(log_path, "ab") as f:
+        f.write(b"not json\n")
+    with open(log_path, "ab") as f:
+        f.write((json.dumps({"seq": 3, "op": "append", "path": ["chat"], "value": "c"}) + "\n").encode())
+    before = open(log_path, "rb").read()
+    try:
+        LogStore(path, {"chat": []})
+        ok = False
+    except ValueError:
+        ok = open(log_path, "rb").read() == before
+    print(f"LogStore corrupt line: {'OK (raised, log kept)' if ok else 'DATA DROPPED'}")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from multiprocessing import Process
+
+    procs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    folder = tempfile.mkdtemp()
+
+    for name, target, path in [
+        ("update_json", _stress_json, os.path.join(folder, "a.json")),
+        ("LogStore", _stress_log, os.path.join(folder, "b.json")),
+    ]:
+        start = time.time()
+        ps = [Process(target=target, args=(path, n)) for _ in range(procs)]
+        for p in ps:
+            p.start()
+        for p in ps:
+            p.join()
+        elapsed = time.time() - start
+
+        if name == "LogStore":
+            from logstore import LogStore
+            data = LogStore(path, {"count": 0, "items": []}).data
+        else:
+            data = read_json(path)
+        expect = procs * n
+        ok = data["count"] == expect and len(data["items"]) == expect
+        print(f"{name}: {procs}x{n} writes, count={data['count']} items={len(data['items'])} "
+              f"({'OK' if ok else 'LOST WRITES'}) {expect / elapsed:.0f} writes/s")
+        if not ok:
+            sys.exit(1)
+
+    if not (_check_torn_log(folder) and _check_corrupt_log(folder)):
+        sys.exit(1)
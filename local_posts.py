@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+
+# ================= AOUSE (4app.py) 게시글 저장소 =================
+# data.json 전체를 읽고 쓰던 것을 SQLite 행 단위로 바꾼다.
+# 좋아요 / 댓글 / 답글은 각각 한 행이라 동작 하나가 글 수와 상관없이 한 번의 작은 쓰기.
+PAGE_SIZE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    author TEXT,
+    text TEXT,
+    image TEXT
+);
+
+CREATE TABLE IF NOT EXISTS likes (
+    post_id TEXT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    PRIMARY KEY (post_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id TEXT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    author TEXT,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id, id);
+
+CREATE TABLE IF NOT EXISTS replies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    comment_id INTEGER NOT NULL REFERENCES comments(id) ON DELETE CASCADE,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_replies_comment ON replies(comment_id, id);
+"""
+
+# 좋아요 수를 글 행에 유지 (목록에서 likes 를 세지 않도록)
+LIKE_COUNT = """
+ALTER TABLE posts ADD COLUMN like_count INTEGER NOT NULL DEFAULT 0;
+UPDATE posts SET like_count = (SELECT COUNT(*) FROM likes WHERE post_id = posts.id);
+"""
+
+
+def import_json(conn: sqlite3.Connection, path):
+    # 예전 data.json -> 테이블 (마이그레이션 단계로 한 번만 돈다).
+    # 파일은 최신 글이 앞에 있으므로 거꾸로 넣어서 seq 순서를 맞춘다.
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    for post in reversed(data):
+        conn.execute(
+            "INSERT OR IGNORE INTO posts (id, author, text, image) VALUES (?,?,?,?)",
+            (post["id"], post["author"], post.get("text"), post.get("image"))
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO likes VALUES (?,?)",
+            [(post["id"], name) for name in post.get("likes", [])]
+        )
+        for c in post.get("comments", []):
+            cid = conn.execute(
+                "INSERT INTO comments (post_id, author, text) VALUES (?,?,?)",
+                (post["id"], c["author"], c["text"])
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO replies (comment_id, text) VALUES (?,?)",
+                [(cid, r) for r in c.get("replies", [])]
+            )
+
+
+def load_posts_page(conn: sqlite3.Connection, me, before=None, limit: int = PAGE_SIZE):
+    # 최신 글 한 페이지 + 내가 눌렀는지 / 댓글 / 답글 (쿼리 4번).
+    # 좋아요 수는 글 행의 like_count, 내 좋아요는 (post_id, name) PK 조회라 글마다 O(1).
+    # -> (글 dict 목록, 다음 페이지 커서)
+    if before is None:
+        rows = conn.execute(
+            "SELECT seq, id, author, text, image, like_count FROM posts ORDER BY seq DESC LIMIT ?",
+            (limit + 1,)
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT seq, id, author, text, image, like_count FROM posts WHERE seq < ? ORDER BY seq DESC LIMIT ?",
+            (before, limit + 1)
+        ).fetchall()
+
+    next_before = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_before = rows[-1][0]
+
+    posts = {
+        pid: {"id": pid, "author": a, "text": t, "image": img,
+              "like_count": n, "liked": False, "comments": []}
+        for _, pid, a, t, img, n in rows
+    }
+    if posts:
+        marks = ",".join("?" * len(posts))
+        ids = tuple(posts)
+        for (pid,) in conn.execute(
+            f"SELECT post_id FROM likes WHERE name = ? AND post_id IN ({marks})",
+            (me, *ids)
+        ):
+            posts[pid]["liked"] = True
+
+        comments = {}
+        for cid, pid, a, t in conn.execute(
+            f"SELECT id, post_id, author, text FROM comments WHERE post_id IN ({marks}) ORDER BY post_id, id",
+            ids
+        ):
+            comments[cid] = {"id": cid, "author": a, "text": t, "replies": []}
+            posts[pid]["comments"].append(comments[cid])
+
+        if comments:
+            cmarks = ",".join("?" * len(comments))
+            for cid, t in conn.execute(
+                f"SELECT comment_id, text FROM replies WHERE comment_id IN ({cmarks}) ORDER BY comment_id, id",
+                tuple(comments)
+            ):
+                comments[cid]["replies"].append(t)
+
+    return list(posts.values()), next_before
+
+
+def load_posts_pages(conn: sqlite3.Connection, me, pages: int, limit: int = PAGE_SIZE):
+    # "더 보기" 로 펼친 페이지들을 이어 붙인다
+    posts, before = [], None
+    for _ in range(pages):
+        page, before = load_posts_page(conn, me, before, limit)
+        posts += page
+        if before is None:
+            break
+    return posts, before
+
+
+# ---------- 쓰기 (db = db.Database) ----------
+def add_post(db, post_id, author, text, image):
+    with db.writer() as w:
+        w.execute(
+            "INSERT INTO posts (id, author, text, image) VALUES (?,?,?,?)",
+            (post_id, author, text, image)
+        )
+
+
+def toggle_like(db, post_id, name):
+    # 있으면 지우고 없으면 넣는다 + like_count 조정 (한 트랜잭션, PK 가 중복을 막음)
+    with db.writer() as w:
+        if w.execute("DELETE FROM likes WHERE post_id=? AND name=?", (post_id, name)).rowcount:
+            delta = -1
+        else:
+            w.execute("INSERT INTO likes VALUES (?,?)", (post_id, name))
+            delta = 1
+        w.execute("UPDATE posts SET like_count = like_count + ? WHERE id=?", (delta, post_id))
+
+
+def add_comment(db, post_id, author, text):
+    with db.writer() as w:
+        w.execute(
+            "INSERT INTO comments (post_id, author, text) VALUES (?,?,?)",
+            (post_id, author, text)
+        )
+
+
+def add_reply(db, comment_id, text):
+    with db.writer() as w:
+        w.execute("INSERT INTO replies (comment_id, text) VALUES (?,?)", (comment_id, text))
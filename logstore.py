@@ -0,0 +1,151 @@
+import copy
+import json
+import os
+import threading
+
+import streamlit as st
+
+from jsonfile import locked, read_json, write_json_atomic
+
+
+# ================= 로그 기반 JSON 저장소 =================
+# channel_data.json 을 통째로 다시 쓰는 대신
+# - 변경 하나당 channel_data.log 에 JSON 한 줄을 덧붙이고
+# - 로그가 compact_every 줄을 넘으면 스냅샷(channel_data.json)으로 합친다.
+# 시작할 때는 스냅샷 + 로그 꼬리를 다시 적용해서 메모리에 올린다.
+#
+# 변경 하나는 {"seq", "op", "path", "value"}.
+#   path  : data 안의 위치 (예: ["feed_fan", 3, "comments"])
+#   op    : set | append | update | incr
+# 스냅샷에는 마지막으로 반영된 seq 를 "_seq" 로 같이 저장해서
+# 스냅샷 교체 직후 로그를 비우기 전에 죽어도 두 번 적용되지 않게 한다.
+#
+# 여러 프로세스가 같은 파일을 써도 된다: 쓰기는 fcntl 잠금 안에서
+# 다른 프로세스가 덧붙인 줄을 먼저 따라 읽고(refresh) 그 뒤에 seq 를 이어 붙인다.
+class LogStore:
+    def __init__(self, path, default, compact_every=500):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.default = default
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+
+        with locked(self.path):
+            self._load_snapshot()
+            self._catch_up()
+            self._drop_torn_tail()
+            self._log = open(self.log_path, "ab")
+            if self._pending >= compact_every:
+                self._compact()
+
+    def _load_snapshot(self):
+        data = read_json(self.path, {})
+        for key, value in self.default.items():
+            data.setdefault(key, copy.deepcopy(value))
+        self.seq = data.pop("_seq", 0)
+        self.data = data
+        self._snap_id = _file_id(self.path)
+        self._offset = 0
+        self._pending = 0
+
+    def _catch_up(self):
+        # 다른 프로세스가 스냅샷을 바꿨으면 다시 읽고, 로그는 읽은 위치 뒤만 적용
+        if _file_id(self.path) != self._snap_id:
+            self._load_snapshot()
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 쓰다 만 마지막 줄 (apply 전에 _drop_torn_tail 이 잘라냄)
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 줄 끝까지 쓰인 줄이 깨졌으면 조용히 넘기지 않는다 (뒤의 변경을 지키려고)
+                    raise ValueError(f"{self.log_path}: {self._offset} 바이트 위치의 로그 줄이 깨졌습니다")
+                self._offset += len(line)
+                self._pending += 1
+                if entry["seq"] <= self.seq:
+                    continue
+                _apply(self.data, entry)
+                self.seq = entry["seq"]
+
+    def _drop_torn_tail(self):
+        # 죽으면서 남긴 쓰다 만 마지막 줄(줄바꿈 없음)만 잘라낸다 (배타 잠금 안에서만).
+        # 그대로 두면 새 줄이 그 뒤에 붙고, 다음 시작 때 거기서 멈춰 전부 사라진다.
+        if not os.path.exists(self.log_path) or os.path.getsize(self.log_path) <= self._offset:
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            rest = f.read()
+        if b"\n" in rest:
+            raise ValueError(f"{self.log_path}: {self._offset} 바이트 뒤를 읽지 못했습니다")
+        os.truncate(self.log_path, self._offset)
+
+    def refresh(self):
+        # rerun 시작할 때 불러서 다른 프로세스의 변경을 반영
+        with self._lock, locked(self.path, shared=True):
+            self._catch_up()
+
+    def apply(self, op, path, value=None):
+        with self._lock, locked(self.path):
+            self._catch_up()
+            self._drop_torn_tail()
+            entry = {"seq": self.seq + 1, "op": op, "path": path, "value": value}
+            _apply(self.data, entry)
+            self.seq += 1
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            self._log.write(line)
+            self._log.flush()
+            self._offset += len(line)
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        with self._lock, locked(self.path):
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        write_json_atomic(self.path, {**self.data, "_seq": self.seq})
+        self._snap_id = _file_id(self.path)
+        self._log.truncate(0)
+        self._offset = 0
+        self._pending = 0
+
+
+def _file_id(path):
+    try:
+        st_ = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st_.st_ino, st_.st_mtime_ns)
+
+
+def _apply(data, entry):
+    *parents, last = entry["path"]
+    target = data
+    for key in parents:
+        target = target[key]
+
+    op, value = entry["op"], entry["value"]
+    if op == "set":
+        target[last] = value
+    elif op == "append":
+        if isinstance(target, dict):
+            target.setdefault(last, []).append(value)
+        else:
+            target[last].append(value)
+    elif op == "update":
+        target[last].update(value)
+    elif op == "incr":
+        target[last] = target.get(last, 0) + value
+    else:
+        raise ValueError(f"unknown op: {op}")
+
+
+@st.cache_resource
+def get_store(path, default):
+    return LogStore(path, default)
@@ -0,0 +1,291 @@
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import RerunException, StopException
+
+
+# ================= rerun 프로파일러 =================
+# 스크립트 rerun 하나 동안의 SQL / Firestore 호출과 구역별 시간을 모은다.
+#   with profiler.start("app.py") as prof:   # 스크립트 본문 전체 (DB 연결 얻기 전부터)
+#       with prof.section("팬 피드"): ...     (또는 prof.mark("글 목록") 으로 구간 나누기)
+#   profiler.debug_panel(prof, admin)        # 맨 끝
+# st.rerun() / st.stop() / 예외로 중간에 끝난 rerun 도 with 를 나갈 때 기록되고("end"),
+# 다음 rerun 의 패널에 같이 보인다 (좋아요 / 댓글 같은 쓰기는 대부분 st.rerun() 으로 끝남).
+# db.Database 의 reader()/writer() 가 wrap() 을 거치므로 앱 코드는 그대로다.
+# 같은 모양의 쿼리가 한 rerun 에 N_PLUS_ONE 번 넘게 돌면 N+1 로 표시한다.
+N_PLUS_ONE = 10
+LOG_FILE = "profile.jsonl"
+CUT_KEY = "_profiler_cut"  # session_state: 중간에 끝난 rerun 요약들
+
+_local = threading.local()
+
+
+class RunProfile:
+    def __init__(self, app):
+        self.app = app
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.total_ms = None
+        self.calls = {}     # 모양 -> {"calls", "ms", "rows"}
+        self.sections = {}  # 이름 -> ms
+        self.done = False
+        self.end = None     # ok | rerun | stop | error
+        self._mark = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc_type)
+        return False
+
+    def stat(self, shape):
+        s = self.calls.get(shape)
+        if s is None:
+            s = self.calls[shape] = {"calls": 0, "ms": 0.0, "rows": 0}
+        return s
+
+    @contextmanager
+    def section(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0.0) + (time.perf_counter() - t) * 1000
+
+    def mark(self, name=None):
+        # 블록으로 감싸기 어려운 스크립트용: 이전 mark 부터 지금까지를 그 구역 시간으로
+        now = time.perf_counter()
+        if self._mark is not None:
+            prev, t = self._mark
+            self.sections[prev] = self.sections.get(prev, 0.0) + (now - t) * 1000
+        self._mark = (name, now) if name else None
+
+    def n_plus_one(self, k=N_PLUS_ONE):
+        return [shape for shape, s in self.calls.items() if s["calls"] > k]
+
+    def summary(self):
+        return {
+            "app": self.app,
+            "ts": self.started,
+            "end": self.end,
+            "total_ms": round(self.total_ms or 0, 2),
+            "sections": {k: round(v, 2) for k, v in self.sections.items()},
+            "calls": [
+                {"shape": k, "calls": s["calls"], "ms": round(s["ms"], 2), "rows": s["rows"]}
+                for k, s in sorted(self.calls.items(), key=lambda kv: -kv[1]["ms"])
+            ],
+            "n_plus_one": self.n_plus_one(),
+        }
+
+    def finish(self, exc_type=None):
+        if self.done:
+            return
+        self.mark()
+        self.done = True
+        self.end = _end_reason(exc_type)
+        self.total_ms = (time.perf_counter() - self._t0) * 1000
+        if getattr(_local, "profile", None) is self:
+            _local.profile = None
+        summary = self.summary()
+        get_log().info(json.dumps(summary, ensure_ascii=False))
+        if self.end != "ok":
+            cut = st.session_state.setdefault(CUT_KEY, [])
+            cut.append(summary)
+            del cut[:-5]
+
+
+def _end_reason(exc_type):
+    if exc_type is None:
+        return "ok"
+    if issubclass(exc_type, RerunException):
+        return "rerun"
+    if issubclass(exc_type, StopException):
+        return "stop"
+    return "error"
+
+
+def start(app):
+    prof = _local.profile = RunProfile(app)
+    return prof
+
+
+def current():
+    prof = getattr(_local, "profile", None)
+    return prof if prof is not None and not prof.done else None
+
+
+@st.cache_resource
+def get_log():
+    log = logging.getLogger("profiler")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    return log
+
+
+# ---------- sqlite3 ----------
+_SPACES = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(\s*,\s*\?)+\s*\)")
+
+
+def sql_shape(sql):
+    # 공백 정리 + IN (?,?,?) 길이 차이 무시
+    return _IN_LIST.sub("(?…)", _SPACES.sub(" ", sql).strip())
+
+
+def wrap(conn):
+    # 프로파일 중인 rerun 이면 감싼 연결, 아니면 그대로
+    prof = current()
+    return ProfiledConnection(conn, prof) if prof else conn
+
+
+class ProfiledConnection:
+    def __init__(self, conn, prof):
+        self._conn = conn
+        self._prof = prof
+
+    def _run(self, method, sql, *args):
+        s = self._prof.stat(sql_shape(sql))
+        t = time.perf_counter()
+        cur = getattr(self._conn, method)(sql, *args)
+        s["calls"] += 1
+        s["ms"] += (time.perf_counter() - t) * 1000
+        return ProfiledCursor(cur, s)
+
+    def execute(self, sql, params=()):
+        return self._run("execute", sql, params)
+
+    def executemany(self, sql, seq):
+        return self._run("executemany", sql, seq)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class ProfiledCursor:
+    # 읽어 간 행 수와 fetch 시간도 같은 모양에 더한다
+    def __init__(self, cur, stat):
+        self._cur = cur
+        self._stat = stat
+
+    def _timed(self, fn, *args):
+        t = time.perf_counter()
+        rows = fn(*args)
+        self._stat["ms"] += (time.perf_counter() - t) * 1000
+        return rows
+
+    def fetchone(self):
+        row = self._timed(self._cur.fetchone)
+        self._stat["rows"] += row is not None
+        return row
+
+    def fetchall(self):
+        rows = self._timed(self._cur.fetchall)
+        self._stat["rows"] += len(rows)
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self._timed(self._cur.fetchmany, *(() if size is None else (size,)))
+        self._stat["rows"] += len(rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+# ---------- Firestore ----------
+# 클라이언트를 감싸서 쿼리 빌더 체인을 이름으로 모으고 (posts.order_by.select.limit)
+# 실제로 서버에 가는 호출(stream / get / commit ...)만 시간을 잰다.
+_FS_RPC = {"stream", "get", "get_all", "add", "set", "update", "delete", "create", "commit"}
+_FS_QUEUED = ("WriteBatch", "Transaction")  # set/update/delete 는 commit 때 나감
+
+
+def wrap_firestore(client):
+    return _FsProxy(client, "db")
+
+
+def _unwrap(v):
+    return v._obj if isinstance(v, _FsProxy) else v
+
+
+class _FsProxy:
+    def __init__(self, obj, label):
+        self._obj = obj
+        self._label = label
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            args = [_unwrap(a) for a in args]
+            kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+            kind = type(self._obj).__name__
+            if name == "collection" and args:
+                label = f"{self._label}/{args[0]}"
+            else:
+                label = f"{self._label}.{name}"
+            prof = current()
+            if prof is None or name not in _FS_RPC or (kind in _FS_QUEUED and name != "commit"):
+                return _fs_wrap(attr(*args, **kwargs), label)
+
+            s = prof.stat("firestore " + label)
+            t = time.perf_counter()
+            result = attr(*args, **kwargs)
+            if name == "stream" or name == "get_all":
+                result = list(result)  # 제너레이터를 여기서 다 읽어야 시간이 맞다
+            s["calls"] += 1
+            s["ms"] += (time.perf_counter() - t) * 1000
+            s["rows"] += len(result) if isinstance(result, list) else 1
+            return _fs_wrap(iter(result) if name in ("stream", "get_all") else result, label)
+
+        return call
+
+
+def _fs_wrap(v, label):
+    # dict / list / 숫자 같은 값은 그대로, 참조·쿼리·배치 같은 객체만 계속 감싼다
+    if v is None or type(v).__module__ == "builtins" or isinstance(v, _FsProxy):
+        return v
+    return _FsProxy(v, label)
+
+
+# ---------- 관리자 패널 ----------
+def debug_panel(prof, admin):
+    cut = st.session_state.pop(CUT_KEY, [])
+    if not admin:
+        return
+    s = prof.summary()
+    with st.sidebar.expander(f"🛠 성능 ({s['total_ms']:.0f} ms)"):
+        for c in cut:
+            st.caption(
+                f"↳ 직전 rerun ({c['end']}, {c['total_ms']:.0f} ms, "
+                f"쿼리 {sum(x['calls'] for x in c['calls'])}번)"
+            )
+            st.dataframe(c["calls"], hide_index=True, width="stretch")
+        n_calls = sum(c["calls"] for c in s["calls"])
+        st.caption(f"쿼리 {n_calls}번 · 행 {sum(c['rows'] for c in s['calls'])}개")
+        for shape in s["n_plus_one"]:
+            st.warning(f"N+1 의심 ({prof.calls[shape]['calls']}번): {shape[:120]}")
+        if s["sections"]:
+            st.dataframe(
+                [{"구역": k, "ms": v} for k, v in s["sections"].items()],
+                hide_index=True, width="stretch"
+            )
+        st.dataframe(s["calls"], hide_index=True, width="stretch")
@@ -0,0 +1,46 @@
+import sqlite3
+
+# ================= Privcht 질문 / 답변 데이터 접근 =================
+PAGE_SIZE = 30
+
+
+def load_threads_page(conn: sqlite3.Connection, before_id=None, limit: int = PAGE_SIZE, unanswered: bool = False):
+    # 최신 질문 limit 개 + 그 답변들 (쿼리 최대 2번).
+    # before_id 는 keyset 커서, unanswered 면 reply_count=0 부분 인덱스로 읽는다.
+    where = ["reply_count = 0"] if unanswered else []
+    args = []
+    if before_id is not None:
+        where.append("id < ?")
+        args.append(before_id)
+    sql = "SELECT * FROM messages"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    msgs = conn.execute(sql + " ORDER BY id DESC LIMIT ?", (*args, limit + 1)).fetchall()
+
+    next_before = None
+    if len(msgs) > limit:
+        msgs = msgs[:limit]
+        next_before = msgs[-1][0]
+
+    replies = {}
+    if msgs and not unanswered:
+        rows = conn.execute(
+            "SELECT * FROM replies WHERE message_id BETWEEN ? AND ? ORDER BY message_id, id",
+            (msgs[-1][0], msgs[0][0])
+        ).fetchall()
+        for r in rows:
+            replies.setdefault(r[1], []).append(r)
+
+    return msgs, replies, next_before
+
+
+def load_threads_pages(conn: sqlite3.Connection, pages: int, limit: int = PAGE_SIZE, unanswered: bool = False):
+    # "이전 질문 더 보기" 로 펼친 페이지들을 이어 붙인다 (id 내림차순)
+    msgs, replies, before = [], {}, None
+    for _ in range(pages):
+        page, page_replies, before = load_threads_page(conn, before, limit, unanswered)
+        msgs += page
+        replies.update(page_replies)
+        if before is None:
+            break
+    return msgs, replies, before
@@ -0,0 +1,100 @@
+import html
+import sqlite3
+
+import streamlit as st
+
+# ================= 전문 검색 (FTS5) =================
+# 내용 테이블마다 외부 콘텐츠 FTS5 테이블 두 개를 두고 트리거로 맞춘다.
+# - <table>_fts       : trigram. 띄어쓰기/조사와 상관없이 한글 부분 문자열이 잡힌다 (3글자 이상)
+# - <table>_fts_words : unicode61 + 1·2글자 접두 인덱스. 2글자 한국어 단어("노래", "사랑")처럼
+#                       trigram 이 못 쓰는 짧은 검색어를 어절 앞부분으로 찾는다 ("노래" -> "노래를")
+# 페이지는 OFFSET 대신 (rank, rowid) 키셋으로 넘긴다.
+PAGE_SIZE = 20
+MIN_TERM = 3
+MARK = ("\x02", "\x03")  # snippet() 강조 표시 (HTML 이스케이프 후 <mark> 로 바꿈)
+
+
+def _fts_sql(fts, table, columns, tokenize):
+    # FTS 테이블 + 동기화 트리거 + 기존 행 색인
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+    {cols}, content='{table}', content_rowid='id', {tokenize}
+);
+CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+    INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+    INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+    INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+END;
+INSERT INTO {fts}({fts}) VALUES ('rebuild');
+"""
+
+
+def fts_migration(table, columns):
+    # 마이그레이션 단계용 SQL: trigram 검색
+    return _fts_sql(f"{table}_fts", table, columns, "tokenize='trigram'")
+
+
+def words_migration(table, columns):
+    # 마이그레이션 단계용 SQL: 짧은 검색어용 어절 접두 검색
+    return _fts_sql(f"{table}_fts_words", table, columns, "tokenize='unicode61', prefix='1 2'")
+
+
+def search(conn: sqlite3.Connection, table, query, after=None, limit: int = PAGE_SIZE):
+    # -> (행 목록, 다음 페이지 키 또는 None)  각 행은 원래 테이블 행 + 강조된 스니펫(HTML)
+    # after: 이전 페이지가 돌려준 (rank, rowid), 그 뒤부터 가져온다
+    terms = query.split()
+    if not terms:
+        return [], None
+
+    # 단어마다 따옴표로 감싸서 AND 검색, rank = bm25
+    if all(len(t) >= MIN_TERM for t in terms):
+        fts = f"{table}_fts"
+        expr = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+    else:
+        fts = f"{table}_fts_words"
+        expr = " ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+    keyset = f"AND ({fts}.rank, {fts}.rowid) > (?, ?) " if after else ""
+    rows = conn.execute(
+        f"SELECT t.*, {fts}.rank, snippet({fts}, -1, ?, ?, '…', 16) FROM {fts} "
+        f"JOIN {table} t ON t.id = {fts}.rowid "
+        f"WHERE {fts} MATCH ? {keyset}ORDER BY {fts}.rank, {fts}.rowid LIMIT ?",
+        (*MARK, expr, *(after or ()), limit + 1)
+    ).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    key = (rows[-1][-2], rows[-1][0]) if more else None  # t.id = rowid (첫 컬럼)
+    return [r[:-2] + (_escape(r[-1]),) for r in rows], key
+
+
+def search_box(conn: sqlite3.Connection, table, key, label="🔍 검색"):
+    # 검색창 + 이전/다음 페이지. -> 현재 페이지 결과 (검색어가 없으면 None)
+    # pages: 지금까지 넘긴 페이지들의 시작 키 (첫 페이지는 None)
+    q = st.text_input(label, key=f"{key}_q").strip()
+    state = st.session_state.setdefault(f"{key}_page", {"q": "", "pages": [None]})
+    if q != state["q"]:
+        state.update(q=q, pages=[None])
+    if not q:
+        return None
+
+    rows, after = search(conn, table, q, state["pages"][-1])
+    c1, c2, c3 = st.columns([1, 1, 4])
+    if len(state["pages"]) > 1 and c1.button("◀", key=f"{key}_prev"):
+        state["pages"].pop()
+        st.rerun()
+    if after and c2.button("▶", key=f"{key}_next"):
+        state["pages"].append(after)
+        st.rerun()
+    c3.caption(f"{len(state['pages'])} 페이지" + ("" if rows else " · 결과 없음"))
+    return rows
+
+
+def _escape(snippet):
+    return html.escape(snippet or "").replace(MARK[0], "<mark>").replace(MARK[1], "</mark>")
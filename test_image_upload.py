@@ -0,0 +1,105 @@
+import io
+import os
+import random
+
+from PIL import Image
+
+from image_upload import PNG_TRANSCODE_OVER, ORIENTATION, get_uploader, prepare
+from thumbs import FORMAT, EXT
+
+GPS = 0x8825
+MAKE = 0x010F
+
+
+def _photo(size=(64, 48)):
+    img = Image.new("RGB", size)
+    img.putdata([(x * 4 % 256, y * 5 % 256, (x + y) % 256) for y in range(size[1]) for x in range(size[0])])
+    return img
+
+
+def _exif():
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[MAKE] = "TestCam"
+    exif[GPS] = {1: "N", 2: (37.0, 33.0, 0.0)}
+    return exif
+
+
+def _file(img, fmt, **kw):
+    f = io.BytesIO()
+    img.save(f, format=fmt, **kw)
+    f.seek(0)
+    return f
+
+
+def _pixels(f):
+    f.seek(0)
+    with Image.open(f) as img:
+        return img.convert("RGB").tobytes()
+
+
+def test_jpeg_keeps_pixels_and_orientation_only():
+    src = _file(_photo(), "JPEG", exif=_exif(), quality=90)
+    with Image.open(src) as img:
+        assert GPS in img.getexif() and MAKE in img.getexif()
+    out, content_type, ext = prepare(src)
+    assert (content_type, ext) == ("image/jpeg", "jpg")
+    assert _pixels(out) == _pixels(src)  # 다시 인코딩하지 않음
+    out.seek(0)
+    with Image.open(out) as img:
+        exif = img.getexif()
+    assert exif.get(ORIENTATION) == 6
+    assert MAKE not in exif and GPS not in exif
+
+
+def test_jpeg_without_rotation_has_no_exif():
+    exif = _exif()
+    exif[ORIENTATION] = 1
+    out, _, _ = prepare(_file(_photo(), "JPEG", exif=exif))
+    assert b"Exif\0\0" not in out.read()
+
+
+def test_webp_drops_exif_chunk():
+    src = _file(_photo(), "WEBP", exif=_exif(), lossless=True)
+    assert b"EXIF" in src.getvalue()
+    out, content_type, ext = prepare(src)
+    data = out.read()
+    assert (content_type, ext) == ("image/webp", "webp")
+    assert b"EXIF" not in data and b"TestCam" not in data
+    assert int.from_bytes(data[4:8], "little") == len(data) - 8  # RIFF 크기 다시 계산
+    assert _pixels(io.BytesIO(data)) == _pixels(src)
+
+
+def test_small_png_drops_text_and_exif():
+    from PIL.PngImagePlugin import PngInfo
+
+    info = PngInfo()
+    info.add_text("Comment", "secret location")
+    src = _file(_photo(), "PNG", pnginfo=info, exif=_exif())
+    out, content_type, ext = prepare(src)
+    data = out.read()
+    assert (content_type, ext) == ("image/png", "png")
+    assert b"tEXt" not in data and b"eXIf" not in data and b"secret" not in data
+    assert _pixels(io.BytesIO(data)) == _pixels(src)
+
+
+def test_large_opaque_png_is_transcoded():
+    random.seed(0)
+    img = Image.frombytes("RGB", (400, 400), random.randbytes(400 * 400 * 3))
+    src = _file(img, "PNG")
+    assert len(src.getvalue()) > PNG_TRANSCODE_OVER
+    out, content_type, ext = prepare(src)
+    assert (content_type, ext) == (f"image/{FORMAT.lower()}", EXT)
+    out.seek(0)
+    with Image.open(out) as res:
+        assert res.format == FORMAT and res.size == (400, 400)
+
+
+def test_get_uploader_is_keyed_on_bucket_name(tmp_path):
+    a = get_uploader(f"local:{tmp_path / 'a'}")
+    b = get_uploader(f"local:{tmp_path / 'b'}")
+    assert a is not b
+    assert a is get_uploader(f"local:{tmp_path / 'a'}")
+    url, fut = b.submit("posts/x", _file(_photo(), "JPEG"))
+    fut.result()
+    assert url == os.path.join(tmp_path, "b", "posts", "x.jpg") and os.path.exists(url)
@@ -0,0 +1,93 @@
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from PIL import Image, ImageOps, features
+
+
+# ================= 썸네일 파이프라인 =================
+# 업로드된 원본 옆에 폭별 축소본을 만들어 두고, 그릴 때는
+# 표시 폭 이상인 것 중 가장 작은 축소본을 고른다.
+#   uploads/abc.png  ->  uploads/abc.png.w320.webp, uploads/abc.png.w720.webp ...
+WIDTHS = (160, 320, 720, 1280)
+FORMAT, EXT = ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+DERIVED = re.compile(r"\.w\d+\.(webp|jpg)$")
+BLOB_NAME = re.compile(r"[0-9a-f]{64}")  # blobstore 파일 (확장자 없음)
+
+
+def derivative_path(path, width):
+    return f"{path}.w{width}.{EXT}"
+
+
+def make_thumbs(path):
+    # 원본보다 작은 폭만 만든다. 임시 파일에 쓰고 rename 해서 반쯤 쓴 파일이 안 보이게.
+    with Image.open(path) as img:
+        if getattr(img, "is_animated", False):
+            return
+        img = ImageOps.exif_transpose(img)
+        if FORMAT == "JPEG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        for width in WIDTHS:
+            if width >= img.width:
+                break
+            out = derivative_path(path, width)
+            if os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(path):
+                continue
+            thumb = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+            with os.fdopen(fd, "wb") as f:
+                thumb.save(f, format=FORMAT, quality=80)
+            os.replace(tmp, out)
+
+
+class Thumbnailer:
+    def __init__(self, root, workers=2):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._done = set()
+        self._pool.submit(self.backfill)
+
+    def schedule(self, path):
+        # 업로드 직후 / 백필 / 첫 렌더에서 부른다. 같은 파일이 이미 작업 중이면 무시.
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+        self._pool.submit(self._run, path)
+
+    def _run(self, path):
+        try:
+            make_thumbs(path)
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+                self._done.add(path)
+
+    def backfill(self):
+        # 이미 저장된 원본들 중 축소본이 없는 것을 백그라운드로 채운다
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if DERIVED.search(name):
+                    continue
+                if name.lower().endswith(IMAGE_EXTS) or BLOB_NAME.fullmatch(name):
+                    self.schedule(os.path.join(dirpath, name))
+
+    def pick(self, path, width):
+        # width 이상인 축소본 중 가장 작은 것, 없으면 원본
+        for w in WIDTHS:
+            if w >= width and os.path.exists(derivative_path(path, w)):
+                return derivative_path(path, w)
+        if path not in self._done:
+            self.schedule(path)
+        return path
+
+
+@st.cache_resource
+def get_thumbnailer(root):
+    return Thumbnailer(root)
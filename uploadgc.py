@@ -0,0 +1,137 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+from blobstore import get_uploads
+
+
+# ================= 업로드 파일 GC =================
+# 어떤 행도 가리키지 않는 업로드 파일(+ 썸네일)을 백그라운드에서 지운다.
+# uploads/ 는 Privcht 와 Private-board 가 같이 쓰므로, 각 앱이 get_gc(root, sources) 로
+# 자기 참조 쿼리를 <root>-refs.db 에 등록해 두고 GC 는 등록된 쿼리를 모두 보고 판단한다.
+# 참조 카운트가 남아 있는 blob 은 (아직 INSERT 전이라도) 지우지 않는다.
+DERIVED = re.compile(r"^(.*)\.w\d+\.(webp|jpg)$")  # thumbs.derivative_path
+
+
+class UploadGC:
+    def __init__(self, uploads, interval=600, grace=3600):
+        # grace: 예전 방식으로 막 저장됐지만 아직 INSERT 전인 파일을 지우지 않도록
+        self.uploads = uploads
+        self.root = uploads.root
+        self.interval = interval
+        self.grace = grace
+        self.reclaimed_files = 0
+        self.reclaimed_bytes = 0
+        self.last_run = None
+        self._lock = threading.Lock()
+        self._registered = set()
+        self._thread = None
+
+    def register(self, sources):
+        # sources: ((DB 파일, 참조 중인 경로를 돌려주는 쿼리), ...)
+        # 다른 프로세스에서 도는 앱의 참조도 보도록 DB 에 남긴다. 첫 등록 뒤에 GC 를 시작.
+        if sources in self._registered:
+            return
+        with self.uploads.refs.writer() as w:
+            w.executemany(
+                "INSERT INTO gc_sources VALUES (?,?) "
+                "ON CONFLICT(db) DO UPDATE SET query = excluded.query",
+                [(os.path.abspath(db), sql) for db, sql in sources]
+            )
+        self._registered.add(sources)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="upload-gc", daemon=True)
+            self._thread.start()
+
+    def _referenced(self):
+        refs = set()
+        sources = self.uploads.refs.reader().execute("SELECT db, query FROM gc_sources").fetchall()
+        for path, sql in sources:
+            if not os.path.exists(path):
+                continue
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+            try:
+                refs.update(os.path.normpath(r[0]) for r in conn.execute(sql) if r[0])
+            finally:
+                conn.close()
+        return refs
+
+    def collect(self):
+        # -> (이번에 지운 파일 수, 바이트)
+        with self._lock:
+            refs = self._referenced()
+            cutoff = time.time() - self.grace
+            candidates = []
+            for dirpath, _, names in os.walk(self.root):
+                for name in names:
+                    path = os.path.normpath(os.path.join(dirpath, name))
+                    m = DERIVED.match(path)
+                    if (m.group(1) if m else path) in refs:
+                        continue
+                    try:
+                        if os.stat(path).st_mtime > cutoff:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    candidates.append(path)
+
+            # 카운트 DB 쓰기 잠금을 잡고 지운다. save() 도 같은 잠금 안에서 카운트를 올린 뒤
+            # 파일이 있는지 보므로, dedup 으로 이미 있는 blob 을 돌려받는 중이면 refs > 0 이다.
+            files = size = 0
+            with self.uploads.refs.writer() as w:
+                w.execute("BEGIN IMMEDIATE")
+                live = {r[0] for r in w.execute("SELECT digest FROM blobs WHERE refs > 0")}
+                for path in candidates:
+                    m = DERIVED.match(path)
+                    if os.path.basename(m.group(1) if m else path) in live:
+                        continue
+                    try:
+                        st_ = os.stat(path)
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                    files += 1
+                    size += st_.st_size
+            self.reclaimed_files += files
+            self.reclaimed_bytes += size
+            self.last_run = time.time()
+            return files, size
+
+    def released(self, size):
+        # UploadStore.release 가 바로 지운 바이트도 회수량에 합친다 (행 삭제 쪽)
+        if size:
+            self.reclaimed_files += 1
+            self.reclaimed_bytes += size
+
+    def _loop(self):
+        while True:
+            try:
+                self.collect()
+            except sqlite3.Error:
+                pass  # 스키마가 아직 없거나 잠겨 있으면 다음 주기에
+            time.sleep(self.interval)
+
+    def report(self):
+        size = self.reclaimed_bytes
+        for unit in ("B", "KB", "MB"):
+            if size < 1024:
+                break
+            size /= 1024
+        else:
+            unit = "GB"
+        return f"🧹 GC: {self.reclaimed_files}개 / {size:.1f} {unit} 회수"
+
+
+@st.cache_resource
+def _get_gc(root):
+    return UploadGC(get_uploads(root))
+
+
+def get_gc(root, sources):
+    gc = _get_gc(root)
+    gc.register(tuple(sources))
+    return gc